@@ -24,7 +24,7 @@ from agents.virality_agent import ViralityAgent
 from utils.gemini_config import GeminiConfig
 from utils.sanitizer import sanitize_topic, sanitize_feedback
 from utils.content_filter import is_safe_for_generation
-from utils.image_generator import create_branded_image, generate_ai_image
+from utils.image_generator import generate_post_image
 
 # URL validation for image security
 from urllib.parse import urlparse
@@ -247,22 +247,16 @@ async def generate_post(request: GenerateRequest):
                 
                 # Try Nano Banana AI image generation first (with full content for dynamic prompts)
                 print(f"[IMAGE] User requested image generation for style: {request.style}")
-                image_path = await generate_ai_image(
+                # Branded fallback renders concurrently with the AI call
+                image_path = await generate_post_image(
+                    content=post_text,  # Pass full content for smarter image generation
                     hook_text=hook,
                     topic=clean_topic,
+                    author_name=author_name,
                     style=request.style,
-                    full_content=post_text  # Pass full content for smarter image generation
+                    subtitle=f"{request.style.title()} Content | AI Generated"
                 )
                 
-                # Fallback to static branded image if AI fails
-                if not image_path:
-                    print("Falling back to static branded image")
-                    image_path = create_branded_image(
-                        text=post_text,
-                        author_name=author_name,
-                        subtitle=f"{request.style.title()} Content | AI Generated"
-                    )
-                
                 if image_path:
                     # Use secure URL resolver with domain validation
                     image_url = safe_resolve_image_url(image_path)
@@ -349,22 +343,17 @@ async def generate_image_for_post(request: GenerateImageRequest):
         hook = request.content.split('\n')[0] if request.content else ""
         
         print(f"[IMAGE] On-demand image generation for style: {request.style}")
-        image_path = await generate_ai_image(
+        # Branded fallback renders concurrently with the AI call
+        image_path = await generate_post_image(
+            content=request.content,
             hook_text=hook,
             topic="User finalized post",
+            author_name="GNX Content Intelligence",
             style=request.style,
-            full_content=request.content
+            subtitle=f"{request.style.title()} Content | AI Generated",
+            use_cache=False  # On-demand requests always get a new image
         )
         
-        # Fallback to static branded image if AI fails
-        if not image_path:
-            print("Falling back to static branded image")
-            image_path = create_branded_image(
-                text=request.content,
-                author_name="GNX Content Intelligence",
-                subtitle=f"{request.style.title()} Content | AI Generated"
-            )
-        
         if image_path:
             # Use secure URL resolver with domain validation
             image_url = safe_resolve_image_url(image_path)
@@ -35,7 +35,7 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 # Supabase ONLY (Clerk works via JWT validation)
 from supabase import create_client
 import config
-from utils.image_generator import create_branded_image
+from utils.image_generator import create_branded_image_async, warm_branded_assets
 
 # Rate limiting (CRITICAL for production)
 try:
@@ -2060,7 +2060,7 @@ async def api_generate(request: ApiGenerateRequest):
                 if request.generate_image:
                     try:
                         # Import image generators
-                        from utils.image_generator import generate_ai_image, create_branded_image
+                        from utils.image_generator import generate_post_image, create_branded_image_async
                         
                         # Extract clean hook for image
                         hook = content.split('\n')[0].replace('**', '')[:100]
@@ -2072,34 +2072,31 @@ async def api_generate(request: ApiGenerateRequest):
                         if generator_type == 'branded':
                             # Use branded template (fast, no AI)
                             logger.info("[IMAGE] Using branded template generator")
-                            image_path = create_branded_image(content, "Kunal Bhat, PMP")
+                            image_path = await create_branded_image_async(content, "Kunal Bhat, PMP")
                             if image_path:
                                 image_url = f"/static/outputs/{os.path.basename(image_path)}"
                                 logger.info(f"[OK] Branded image generated: {image_url}")
                         else:
-                            # Use Gemini AI (gemini or default)
+                            # Use Gemini AI (gemini or default); the branded fallback
+                            # renders concurrently and is used if the AI call fails
+                            # or exceeds its time budget
                             logger.info("[IMAGE] Using Gemini AI generator (Nano Banana)")
-                            image_path = await generate_ai_image(
+                            image_path = await generate_post_image(
+                                content=content,
                                 hook_text=hook,
                                 topic=request.topic,
-                                style=request.style,
-                                full_content=content
+                                author_name="Kunal Bhat, PMP",
+                                style=request.style
                             )
                             
                             if image_path:
                                 image_url = f"/static/outputs/{os.path.basename(image_path)}"
-                                logger.info(f"[OK] AI image generated: {image_url}")
-                            else:
-                                # Fallback to branded image if AI fails
-                                logger.warning("AI image generation failed, using branded fallback")
-                                fallback_path = create_branded_image(content, "Kunal Bhat, PMP")
-                                if fallback_path:
-                                    image_url = f"/static/outputs/{os.path.basename(fallback_path)}"
+                                logger.info(f"[OK] Image generated: {image_url}")
                     except Exception as img_err:
                         logger.error(f"Image generation failed: {img_err}")
                         # Try branded fallback
                         try:
-                            fallback_path = create_branded_image(content, "Kunal Bhat, PMP")
+                            fallback_path = await create_branded_image_async(content, "Kunal Bhat, PMP")
                             if fallback_path:
                                 image_url = f"/static/outputs/{os.path.basename(fallback_path)}"
                         except Exception as fallback_err:
@@ -2236,7 +2233,7 @@ async def api_generate_image(request: ImageGenerateRequest):
     
     try:
         # Import image generators
-        from utils.image_generator import generate_ai_image, create_branded_image
+        from utils.image_generator import generate_ai_image, create_branded_image_async
         
         # Extract a hook/headline from the content (first line or first 100 chars)
         content_lines = request.content.strip().split('\n')
@@ -2253,7 +2250,7 @@ async def api_generate_image(request: ImageGenerateRequest):
         if generator_type == 'branded':
             # Use branded template (fast, no AI)
             logger.info("[IMAGE] Using branded template generator")
-            image_path = create_branded_image(request.content, "Kunal Bhat, PMP")
+            image_path = await create_branded_image_async(request.content, "Kunal Bhat, PMP", use_cache=False)
         else:
             # Use Gemini AI (default)
             logger.info("[IMAGE] Using Gemini AI generator (Nano Banana)")
@@ -2261,7 +2258,8 @@ async def api_generate_image(request: ImageGenerateRequest):
                 hook_text=hook_clean,
                 topic=request.topic or "LinkedIn content",
                 style=request.style or "professional",
-                full_content=request.content
+                full_content=request.content,
+                use_cache=False  # On-demand requests always get a new image
             )
         
         if image_path and os.path.exists(image_path):
@@ -2286,7 +2284,7 @@ async def api_generate_image(request: ImageGenerateRequest):
         else:
             # Fallback to branded image if AI fails
             logger.warning("Primary generator failed, using branded fallback")
-            fallback_path = create_branded_image(request.content, "GNX CIS")
+            fallback_path = await create_branded_image_async(request.content, "GNX CIS", use_cache=False)
             if fallback_path:
                 image_url = f"/static/outputs/{os.path.basename(fallback_path)}"
                 return {
@@ -2376,7 +2374,7 @@ async def generate_post(
         # Generate real image using PIL
         image_path = None
         try:
-            image_path = create_branded_image(content, "Kunal Bhat, PMP")
+            image_path = await create_branded_image_async(content, "Kunal Bhat, PMP")
             logger.info(f"[OK] DEV_MODE: Image generated successfully")
         except Exception as img_err:
             logger.error(f"[ERROR] DEV_MODE: Image generation failed: {img_err}")
@@ -2440,7 +2438,7 @@ async def generate_post(
             # Generate image
             image_path = None
             try:
-                image_path = create_branded_image(
+                image_path = await create_branded_image_async(
                     content, 
                     profile.get("full_name", db_user.get("full_name", "User"))
                 )
@@ -3001,6 +2999,7 @@ async def startup_event():
     logger.info("[STARTUP] Starting CIS API...")
     logger.info(f"[OK] Clerk: {'Ready' if CLERK_READY else 'Not configured'}")
     logger.info(f"[OK] Supabase: {'Ready' if SUPABASE_READY else 'Not available'}")
+    logger.info(f"[OK] Branded images: {'Ready' if warm_branded_assets() else 'Fonts missing'}")
     logger.info("=" * 50)
 
 @app.on_event("shutdown")
@@ -0,0 +1,577 @@
+"""
+Tests for the branded image renderer in utils/image_generator.py
+
+Run with: pytest tests/test_image_generator.py -v
+"""
+
+import asyncio
+import collections
+import os
+import time
+import subprocess
+import sys
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from PIL import Image, ImageChops
+
+
+@pytest.fixture
+def image_generator(tmp_path, monkeypatch):
+    """image_generator module writing to a temp dir with uploads disabled"""
+    from utils import image_generator
+    monkeypatch.setattr(image_generator, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(image_generator, "SUPABASE_STORAGE_AVAILABLE", False)
+    monkeypatch.setattr(image_generator, "IMAGE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(image_generator, "_IMAGE_URL_CACHE", collections.OrderedDict())
+    return image_generator
+
+
+class TestBrandedTemplate:
+    """Tests for the shared, read-only branded template"""
+
+    def test_template_is_built_once(self, image_generator):
+        """_get_template should return the same cached image on every call"""
+        first, _ = image_generator._get_template()
+        second, _ = image_generator._get_template()
+        assert first is second
+
+    def test_template_not_mutated_by_render(self, image_generator):
+        """Rendering a post must not draw onto the shared template"""
+        template, _ = image_generator._get_template()
+        before = template.copy()
+        image_generator.create_branded_image("Data first, code second.", "Test Author")
+        assert ImageChops.difference(before, template).getbbox() is None
+
+
+class TestCreateBrandedImage:
+    """Tests for create_branded_image output"""
+
+    def test_returns_local_png_path(self, image_generator, tmp_path):
+        """Without Supabase the local absolute path is returned"""
+        path = image_generator.create_branded_image("Short hook", "Test Author")
+        assert path is not None
+        assert os.path.dirname(path) == str(tmp_path)
+        with Image.open(path) as img:
+            assert img.size == (image_generator.BRANDED_W, image_generator.BRANDED_H)
+
+    def test_async_variant_renders_off_the_event_loop(self, image_generator, tmp_path):
+        """create_branded_image_async renders on the I/O pool"""
+        loop_thread = threading.get_ident()
+        render_threads = []
+        original = image_generator.create_branded_image
+
+        def recording(*args, **kwargs):
+            render_threads.append(threading.get_ident())
+            return original(*args, **kwargs)
+
+        with patch.object(image_generator, "create_branded_image", recording):
+            path = asyncio.run(image_generator.create_branded_image_async("Async hook", "Test Author"))
+        assert os.path.dirname(path) == str(tmp_path)
+        assert render_threads and render_threads[0] != loop_thread
+
+    def test_output_paths_are_unique_across_threads(self, image_generator, tmp_path):
+        """Concurrent savers never get the same filename"""
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.extend(image_generator._new_output_path("post") for _ in range(200)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(paths)) == 800
+        assert all(os.path.dirname(p) == str(tmp_path) for p in paths)
+
+    def test_long_hook_is_rendered(self, image_generator):
+        """Hooks over IMAGE_HOOK_LIMIT are truncated, not rejected"""
+        path = image_generator.create_branded_image("word " * 120, "Test Author")
+        assert path is not None
+
+
+class TestFontLoading:
+    """Tests for the cached branded fonts"""
+
+    def test_fonts_are_cached(self, image_generator):
+        """_get_fonts should load the TTF files only once"""
+        assert image_generator._get_fonts() is image_generator._get_fonts()
+
+    def test_missing_fonts_fail_fast(self, image_generator, tmp_path, monkeypatch):
+        """Missing fonts return None instead of rendering with the default font"""
+        monkeypatch.setattr(image_generator, "ASSETS_DIR", str(tmp_path / "missing"))
+        monkeypatch.setattr(image_generator, "_FONTS", None)
+        monkeypatch.setattr(image_generator, "_FONT_LOAD_FAILED", False)
+
+        assert image_generator.create_branded_image("Hook", "Test Author") is None
+        assert image_generator._FONT_LOAD_FAILED is True
+        with pytest.raises(image_generator.FontLoadError):
+            image_generator._get_fonts()
+
+
+class TestBatchRender:
+    """Tests for create_branded_images_batch"""
+
+    def test_batch_returns_one_path_per_item_in_order(self, image_generator):
+        """Each item gets its own image, results keep input order"""
+        items = [(f"Hook number {i}", "Test Author", "Subtitle") for i in range(3)]
+        paths = image_generator.create_branded_images_batch(items)
+        assert len(paths) == 3
+        assert all(p is not None for p in paths)
+        assert len(set(paths)) == 3
+
+    def test_batch_matches_single_render(self, image_generator):
+        """Batch output is identical to create_branded_image output"""
+        single = image_generator.create_branded_image("Same hook", "Test Author", "Subtitle")
+        [batched] = image_generator.create_branded_images_batch([("Same hook", "Test Author", "Subtitle")])
+        with Image.open(single) as a, Image.open(batched) as b:
+            assert ImageChops.difference(a.convert("RGB"), b.convert("RGB")).getbbox() is None
+
+
+class TestHookLayout:
+    """Tests for the memoized hook layout"""
+
+    def test_layout_is_memoized(self, image_generator):
+        """Same hook text returns the cached layout object"""
+        first = image_generator._layout_hook("Start with data, not code")
+        assert image_generator._layout_hook("Start with data, not code") is first
+
+    def test_layout_lines_are_centered(self, image_generator):
+        """x offsets center each line within the text overlay"""
+        font = image_generator._get_fonts()[0]
+        for line, x in image_generator._layout_hook("word " * 40):
+            width = font.getlength(line)
+            assert abs((image_generator.TEXT_OVERLAY_W - width) / 2 - x) <= 2
+
+
+class TestOutputCache:
+    """Tests for the content-hash image output cache"""
+
+    def test_identical_inputs_reuse_output(self, image_generator):
+        """A repeat render returns the first result without re-rendering"""
+        first = image_generator.create_branded_image("Cached hook", "Test Author")
+        with patch.object(image_generator, "_render_branded_image") as render:
+            second = image_generator.create_branded_image("Cached hook", "Test Author")
+        render.assert_not_called()
+        assert second == first
+
+    def test_cache_survives_restart_via_sidecar(self, image_generator, monkeypatch):
+        """The .url sidecar file repopulates an empty in-memory cache"""
+        image_generator._store_cached_output("key", "https://cdn/img.png")
+        monkeypatch.setattr(image_generator, "_IMAGE_URL_CACHE", collections.OrderedDict())
+        assert image_generator._get_cached_output("key") == "https://cdn/img.png"
+
+    def test_sidecars_stay_out_of_static_outputs(self, image_generator):
+        """Sidecars live in IMAGE_CACHE_DIR and local paths are never persisted"""
+        image_generator._store_cached_output("public", "https://cdn/img.png")
+        local = image_generator.create_branded_image("Local hook", "Test Author")
+        assert os.listdir(image_generator.IMAGE_CACHE_DIR) == ["public.url"]
+        assert not any(name.endswith(".url") for name in os.listdir(image_generator.OUTPUT_DIR))
+        assert local.endswith(".png")
+
+    def test_least_recently_used_entry_is_evicted(self, image_generator, monkeypatch):
+        """The in-memory cache holds at most IMAGE_URL_CACHE_SIZE entries"""
+        monkeypatch.setattr(image_generator, "IMAGE_URL_CACHE_SIZE", 2)
+        monkeypatch.setattr(image_generator, "IMAGE_CACHE_DIR", os.devnull)  # no sidecars
+        for key in ("a", "b"):
+            image_generator._store_cached_output(key, f"https://cdn/{key}.png")
+        image_generator._get_cached_output("a")
+        image_generator._store_cached_output("c", "https://cdn/c.png")
+        assert list(image_generator._IMAGE_URL_CACHE) == ["a", "c"]
+
+    def test_expired_entry_is_dropped(self, image_generator, monkeypatch):
+        """Entries older than the TTL are removed, sidecar included"""
+        image_generator._store_cached_output("old", "https://cdn/old.png")
+        monkeypatch.setattr(time, "time", lambda: 10 ** 12)
+        assert image_generator._get_cached_output("old") is None
+        assert "old" not in image_generator._IMAGE_URL_CACHE
+        assert not os.listdir(image_generator.IMAGE_CACHE_DIR)
+
+    def test_use_cache_false_renders_again(self, image_generator):
+        """Bypassing the cache produces a new image that replaces the entry"""
+        first = image_generator.create_branded_image("Fresh hook", "Test Author")
+        second = image_generator.create_branded_image("Fresh hook", "Test Author", use_cache=False)
+        assert second != first
+        assert image_generator.create_branded_image("Fresh hook", "Test Author") == second
+
+    def test_missing_local_file_is_regenerated(self, image_generator):
+        """A cached local path whose file was removed is not returned"""
+        first = image_generator.create_branded_image("Deleted hook", "Test Author")
+        os.remove(first)
+        second = image_generator.create_branded_image("Deleted hook", "Test Author")
+        assert second is not None
+        assert os.path.exists(second)
+
+    def test_different_author_is_not_a_hit(self, image_generator):
+        """Every input participates in the cache key"""
+        a = image_generator.create_branded_image("Shared hook", "Author A")
+        b = image_generator.create_branded_image("Shared hook", "Author B")
+        assert a != b
+
+
+class TestBackgroundUpload:
+    """Tests for upload_in_background=True"""
+
+    def test_returns_local_path_then_public_url(self, image_generator, monkeypatch):
+        """Caller gets the local file immediately and can await the URL"""
+        uploads = []
+
+        def fake_upload(local_path, style, cleanup_local=True):
+            uploads.append((local_path, style, cleanup_local))
+            return "https://example.supabase.co/storage/v1/object/public/images/branded/x.png"
+
+        monkeypatch.setattr(image_generator, "SUPABASE_STORAGE_AVAILABLE", True)
+        monkeypatch.setattr(image_generator, "upload_image_to_supabase", fake_upload, raising=False)
+        monkeypatch.setattr(image_generator, "_PENDING_UPLOADS", {})
+
+        path = image_generator.create_branded_image("Background hook", "Test Author", upload_in_background=True)
+        assert os.path.exists(path)
+
+        url = asyncio.run(image_generator.get_public_url(path))
+        assert url.startswith("https://")
+        assert uploads == [(path, "branded", False)]
+        # The local file is kept because the caller may already be serving it
+        assert os.path.exists(path)
+        assert image_generator.create_branded_image("Background hook", "Test Author") == url
+
+    def test_get_public_url_without_pending_upload(self, image_generator):
+        """Unknown paths resolve to themselves"""
+        assert asyncio.run(image_generator.get_public_url("/tmp/none.png")) == "/tmp/none.png"
+
+    def test_blocking_upload_sends_bytes_without_local_file(self, image_generator, tmp_path, monkeypatch):
+        """Default uploads go straight from memory to Supabase"""
+        uploaded = []
+
+        def fake_upload_bytes(data, style, ext):
+            uploaded.append((data[:8], style, ext))
+            return "https://example.supabase.co/storage/v1/object/public/images/branded/y.png"
+
+        monkeypatch.setattr(image_generator, "SUPABASE_STORAGE_AVAILABLE", True)
+        monkeypatch.setattr(image_generator, "upload_image_bytes_to_supabase", fake_upload_bytes, raising=False)
+
+        url = image_generator.create_branded_image("Bytes hook", "Test Author")
+        assert url.startswith("https://")
+        assert uploaded == [(b"\x89PNG\r\n\x1a\n", "branded", ".png")]
+        assert not list(tmp_path.glob("*.png"))
+
+
+class TestImagePrompt:
+    """Tests for the Nano Banana prompt builder"""
+
+    def test_metrics_capped_at_five(self, image_generator):
+        """Only the first five metrics make it into the prompt"""
+        content = "Results. We saw 10%, 20%, $5M, 3x, 50+ and 99% gains."
+        _, prompt = image_generator._build_image_prompt("", "", "professional", content)
+        assert "Numbers in bold: 10%, 20%, $5M, 3x, 50+\n" in prompt
+
+    def test_first_sentence_becomes_headline(self, image_generator):
+        """Headline is the first sentence; the rest is the content section"""
+        content = "**Data first**. Then code follows."
+        style_key, prompt = image_generator._build_image_prompt("", "", "Thought Leadership", content)
+        assert style_key == "thought_leadership"
+        assert '"Data first"' in prompt
+        assert "Then code follows." in prompt
+
+    def test_content_without_period_is_kept_whole(self, image_generator):
+        """With no sentence break the full text is used as content"""
+        _, prompt = image_generator._build_image_prompt("hook", "topic", "professional")
+        assert "topic\n\nhook" in prompt
+        assert prompt.endswith(image_generator.IMAGE_QUALITY_RULES)
+
+    @pytest.mark.parametrize("style", ["professional", "technical", "thought_leadership",
+                                       "inspirational", "storytelling"])
+    def test_compiled_template_matches_format(self, image_generator, style):
+        """Pre-split templates render exactly like str.format"""
+        template = image_generator.IMAGE_PROMPT_LIBRARY[style] + image_generator.IMAGE_QUALITY_RULES
+        fields = {"content": "Body with {braces}", "headline": "Head", "metrics": "10%, 3x"}
+        compiled = image_generator._PREBAKED_PROMPTS[style]
+        assert image_generator._render_prompt(compiled, fields) == template.format(**fields)
+
+    def test_compiled_template_unescapes_braces(self, image_generator):
+        """Escaped braces in a template come out as literals"""
+        compiled = image_generator._compile_prompt("{{json}} {headline}")
+        assert image_generator._render_prompt(compiled, {"headline": "H"}) == "{json} H"
+
+
+class TestHookTruncation:
+    """Tests for _truncate_hook boundary selection"""
+
+    def test_prefers_sentence_boundary(self, image_generator):
+        """A sentence end past the first third wins over later commas"""
+        hook = "a" * 100 + ". " + "b" * 100 + ", " + "c " * 50
+        assert image_generator._truncate_hook(hook) == "a" * 100 + "."
+
+    def test_punctuation_priority_order(self, image_generator):
+        """'.' beats a later '!' as long as both pass the minimum offset"""
+        hook = "a" * 90 + ". " + "b" * 90 + "! " + "c" * 100
+        assert image_generator._truncate_hook(hook).endswith("a.")
+
+    def test_falls_back_to_comma_then_word(self, image_generator):
+        """Comma past half the limit, otherwise last word plus ellipsis"""
+        comma_hook = "a" * 150 + ", " + "b " * 60
+        assert image_generator._truncate_hook(comma_hook) == "a" * 150 + "..."
+        word_hook = "word " * 60
+        assert image_generator._truncate_hook(word_hook).endswith("word...")
+
+
+class TestWarmup:
+    """Tests for warm_branded_assets"""
+
+    def test_warmup_builds_fonts_and_template(self, image_generator, monkeypatch):
+        """After warm-up the hot path finds everything cached"""
+        monkeypatch.setattr(image_generator, "_TEMPLATE", None)
+        assert image_generator.warm_branded_assets() is True
+        assert image_generator._TEMPLATE is not None
+        assert image_generator._FONTS is not None
+
+    def test_warmup_reports_missing_fonts(self, image_generator, tmp_path, monkeypatch):
+        """Missing fonts are reported instead of raised"""
+        monkeypatch.setattr(image_generator, "ASSETS_DIR", str(tmp_path / "missing"))
+        monkeypatch.setattr(image_generator, "_FONTS", None)
+        monkeypatch.setattr(image_generator, "_FONT_LOAD_FAILED", False)
+        assert image_generator.warm_branded_assets() is False
+
+    def test_import_defers_heavy_modules(self):
+        """Importing the module leaves google.genai and emoji unloaded"""
+        code = ("import sys, utils.image_generator; "
+                "print('google.genai' in sys.modules, 'emoji' in sys.modules)")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip().splitlines()[-1] == "False False"
+
+
+class TestHookCleaning:
+    """Tests for _clean_hook_text"""
+
+    def test_emoji_removed(self, image_generator):
+        """Emojis anywhere in the hook are stripped"""
+        assert image_generator._clean_hook_text("🔥 big news ⭐ today") == "Big news  today"
+
+    def test_ascii_hook_skips_emoji_scan(self, image_generator):
+        """ASCII hooks never reach the emoji library"""
+        with patch("emoji.replace_emoji") as replace:
+            assert image_generator._clean_hook_text("**plain** hook\nbody") == "Plain hook"
+        replace.assert_not_called()
+
+
+class TestBackground:
+    """Tests for the template background"""
+
+    def test_gradient_background(self, image_generator, monkeypatch):
+        """BRANDED_BG_GRADIENT blends from the top color to the bottom color"""
+        monkeypatch.setattr(image_generator, "BRANDED_BG_GRADIENT", ((0, 0, 0), (200, 100, 50)))
+        bg = image_generator._build_background(40, 256)
+        assert bg.getpixel((0, 0)) == (0, 0, 0)
+        assert bg.getpixel((39, 255)) == (200, 100, 50)
+        assert bg.getpixel((0, 128))[0] == pytest.approx(100, abs=2)
+
+    def test_solid_background_by_default(self, image_generator):
+        """Without a gradient the template uses the flat navy fill"""
+        bg = image_generator._build_background(10, 10)
+        assert bg.getcolors() == [(100, image_generator.BRANDED_BG_COLOR)]
+
+
+class TestGeneratePostImage:
+    """Tests for the AI image with concurrent branded fallback"""
+
+    def test_ai_result_wins(self, image_generator, monkeypatch, tmp_path):
+        """A successful AI image is returned and the fallback isn't saved"""
+        async def fake_ai(**kwargs):
+            return "https://example.com/ai.png"
+
+        monkeypatch.setattr(image_generator, "generate_ai_image", fake_ai)
+        result = asyncio.run(image_generator.generate_post_image("Post body", "Hook", "Topic", "Author"))
+        assert result == "https://example.com/ai.png"
+        assert not list(tmp_path.glob("*.png"))
+
+    def test_failed_ai_uses_branded(self, image_generator, monkeypatch):
+        """A None AI result falls back to the branded render"""
+        async def fake_ai(**kwargs):
+            return None
+
+        monkeypatch.setattr(image_generator, "generate_ai_image", fake_ai)
+        result = asyncio.run(image_generator.generate_post_image("Post body", "Hook", "Topic", "Author"))
+        assert result is not None and result.endswith(".png")
+
+    def test_slow_ai_times_out_to_branded(self, image_generator, monkeypatch):
+        """ai_timeout bounds how long the caller waits for Gemini"""
+        async def slow_ai(**kwargs):
+            await asyncio.sleep(5)
+            return "https://example.com/late.png"
+
+        monkeypatch.setattr(image_generator, "generate_ai_image", slow_ai)
+        result = asyncio.run(image_generator.generate_post_image(
+            "Post body", "Hook", "Topic", "Author", ai_timeout=0.05))
+        assert result is not None and result.endswith(".png")
+
+    def test_ai_wait_is_bounded_by_default(self, image_generator):
+        """Without an explicit ai_timeout the Nano Banana budget applies"""
+        import inspect
+
+        default = inspect.signature(image_generator.generate_post_image).parameters["ai_timeout"].default
+        assert default == image_generator.NANO_BANANA_TIMEOUT_SECONDS > 0
+
+    def test_abandoned_render_error_is_retrieved(self, image_generator, monkeypatch):
+        """A failed render abandoned mid-wait isn't reported as never retrieved"""
+        import gc
+
+        def broken_render(*args):
+            raise RuntimeError("render failed")
+
+        async def slow_ai(**kwargs):
+            await asyncio.sleep(5)
+            return "https://example.com/ai.png"
+
+        monkeypatch.setattr(image_generator, "_render_branded_image", broken_render)
+        monkeypatch.setattr(image_generator, "generate_ai_image", slow_ai)
+        unhandled = []
+
+        async def run():
+            asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: unhandled.append(ctx))
+            # e.g. the client disconnects while Gemini is still working
+            task = asyncio.create_task(image_generator.generate_post_image("Post body", "Hook", "Topic", "Author"))
+            await asyncio.sleep(0.05)  # the render has failed by now
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            del task
+            gc.collect()
+
+        asyncio.run(run())
+        assert unhandled == []
+
+
+class TestPixelWrap:
+    """Tests for _wrap_pixels"""
+
+    def test_lines_fit_max_width(self, image_generator):
+        """Every wrapped line renders within the requested width"""
+        font = image_generator._get_fonts()[0]
+        text = "The secret to SAP migrations nobody tells you: start with data, not code"
+        lines = image_generator._wrap_pixels(text, font, 600)
+        assert len(lines) > 1
+        assert all(font.getlength(line) <= 600 for line in lines)
+        assert " ".join(lines) == text
+
+    def test_narrow_glyphs_pack_more_per_line(self, image_generator):
+        """Wrapping follows glyph widths, not character counts"""
+        font = image_generator._get_fonts()[0]
+        narrow = image_generator._wrap_pixels("il " * 40, font, 500)
+        wide = image_generator._wrap_pixels("WM " * 40, font, 500)
+        assert len(narrow[0]) > len(wide[0])
+
+    def test_overlong_word_is_broken(self, image_generator):
+        """A single word wider than the line is split across lines"""
+        font = image_generator._get_fonts()[0]
+        lines = image_generator._wrap_pixels("W" * 60, font, 400)
+        assert "".join(lines) == "W" * 60
+        assert all(font.getlength(line) <= 400 for line in lines)
+
+
+def _fake_genai_response(image_bytes: bytes):
+    """Minimal Nano Banana response holding one inline PNG part"""
+    from google.genai import types
+    part = types.Part(inline_data=types.Blob(data=image_bytes, mime_type="image/png"))
+    response = MagicMock()
+    response.candidates[0].content.parts = [part]
+    return response
+
+
+@pytest.fixture
+def fake_genai(image_generator, monkeypatch):
+    """Patch the Gemini client so generate_ai_image returns a tiny PNG"""
+    import io
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buf, format="PNG")
+
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(return_value=_fake_genai_response(buf.getvalue()))
+    genai = MagicMock()
+    genai.Client.return_value = client
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(image_generator, "NANO_BANANA_AVAILABLE", True)
+    monkeypatch.setattr(image_generator, "genai", genai)
+    monkeypatch.setattr(image_generator, "_genai_client", None)
+    return client
+
+
+class TestGenerateAiImage:
+    """Tests for generate_ai_image with a mocked Gemini client"""
+
+    def test_saves_image_off_the_event_loop(self, image_generator, fake_genai, monkeypatch):
+        """File write/upload runs on the I/O pool, not the loop thread"""
+        threads = []
+        real_save = image_generator._save_ai_image
+
+        def recording_save(*args):
+            threads.append(threading.current_thread().name)
+            return real_save(*args)
+
+        monkeypatch.setattr(image_generator, "_save_ai_image", recording_save)
+        path = asyncio.run(image_generator.generate_ai_image("Hook", "Topic", "technical"))
+        assert path is not None and os.path.exists(path)
+        assert threads and threads[0] != threading.main_thread().name
+
+    def test_identical_prompt_hits_cache(self, image_generator, fake_genai):
+        """A repeated prompt does not call Gemini again"""
+        first = asyncio.run(image_generator.generate_ai_image("Hook", "Topic", "technical"))
+        second = asyncio.run(image_generator.generate_ai_image("Hook", "Topic", "technical"))
+        assert first == second
+        assert fake_genai.aio.models.generate_content.await_count == 1
+
+    def test_client_is_reused(self, image_generator, fake_genai, monkeypatch):
+        """One Gemini client serves every call for the same API key"""
+        asyncio.run(image_generator.generate_ai_image("Hook A", "Topic", "technical"))
+        asyncio.run(image_generator.generate_ai_image("Hook B", "Topic", "technical"))
+        assert image_generator.genai.Client.call_count == 1
+
+    def test_batch_bounds_concurrency(self, image_generator, monkeypatch):
+        """generate_ai_images_batch keeps order and caps in-flight calls"""
+        in_flight = 0
+        peak = 0
+
+        async def fake_ai(hook_text, topic, style, full_content):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return f"{hook_text}.png"
+
+        monkeypatch.setattr(image_generator, "generate_ai_image", fake_ai)
+        jobs = [(f"hook{i}", "Topic", "technical", None) for i in range(8)]
+        results = asyncio.run(image_generator.generate_ai_images_batch(jobs, concurrency=3))
+        assert results == [f"hook{i}.png" for i in range(8)]
+        assert peak == 3
+
+    def test_inline_bytes_written_verbatim(self, image_generator, fake_genai):
+        """The saved file is exactly the PNG bytes Gemini returned"""
+        path = asyncio.run(image_generator.generate_ai_image("Verbatim", "Topic", "technical"))
+        response = fake_genai.aio.models.generate_content.return_value
+        with open(path, "rb") as f:
+            assert f.read() == response.candidates[0].content.parts[0].inline_data.data
+
+    def test_global_semaphore_caps_gemini_calls(self, image_generator, fake_genai, monkeypatch):
+        """NANO_BANANA_CONCURRENCY bounds calls even across independent callers"""
+        monkeypatch.setattr(image_generator, "NANO_BANANA_CONCURRENCY", 1)
+        monkeypatch.setattr(image_generator, "_nano_banana_semaphore", None)
+        response = fake_genai.aio.models.generate_content.return_value
+        in_flight = peak = 0
+
+        async def slow_generate(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return response
+
+        fake_genai.aio.models.generate_content.side_effect = slow_generate
+
+        async def run_all():
+            return await asyncio.gather(*(image_generator.generate_ai_image(f"Hook {i}", "Topic", "technical")
+                                          for i in range(3)))
+
+        assert all(asyncio.run(run_all()))
+        assert peak == 1
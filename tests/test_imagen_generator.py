@@ -0,0 +1,210 @@
+"""
+Tests for the GCS upload path in utils/imagen_generator.py
+
+Run with: pytest tests/test_imagen_generator.py -v
+"""
+
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def imagen(monkeypatch):
+    """imagen_generator module with a generator wired to a mock bucket"""
+    from utils import imagen_generator
+    generator = imagen_generator.ImagenGenerator.__new__(imagen_generator.ImagenGenerator)
+    generator.enabled = True
+    generator.model = MagicMock()
+    generator.storage_client = MagicMock()
+    generator.bucket = MagicMock()
+    monkeypatch.setattr(imagen_generator, "transfer_manager", MagicMock(THREAD="thread"), raising=False)
+    return imagen_generator, generator
+
+
+def _image(data: bytes):
+    image = MagicMock()
+    image._image_bytes = data
+    return image
+
+
+class TestUploadToGcs:
+    """Tests for ImagenGenerator._upload_to_gcs"""
+
+    @pytest.mark.parametrize("uniform_access, acl", [(False, "publicRead"), (True, None)])
+    def test_small_image_single_request(self, imagen, uniform_access, acl):
+        """Small images are uploaded, and made public, in one request"""
+        module, generator = imagen
+        generator.bucket.iam_configuration.uniform_bucket_level_access_enabled = uniform_access
+        blob = generator.bucket.blob.return_value
+        generator._upload_to_gcs(_image(b"png"), "Small topic")
+
+        blob.upload_from_string.assert_called_once_with(
+            b"png", content_type="image/png", predefined_acl=acl, if_generation_match=0, checksum="crc32c"
+        )
+        blob.make_public.assert_not_called()
+        module.transfer_manager.upload_chunks_concurrently.assert_not_called()
+
+    def test_object_name_is_sanitized(self, imagen):
+        """Topic characters outside [0-9A-Za-z] become underscores"""
+        _, generator = imagen
+        generator._upload_to_gcs(_image(b"png"), "SAP S/4HANA: Día 1 & beyond, with a long tail")
+        name = generator.bucket.blob.call_args.args[0]
+        assert name.startswith("linkedin_posts/")
+        assert name.endswith("_SAP_S_4HANA__D_a_1___beyo.png")
+
+    def test_large_image_uploaded_in_parallel_chunks(self, imagen, monkeypatch):
+        """Images over the limit go through transfer_manager with threads"""
+        module, generator = imagen
+        generator.bucket.iam_configuration.uniform_bucket_level_access_enabled = False
+        monkeypatch.setattr(module, "SINGLE_REQUEST_UPLOAD_LIMIT", 4)
+        uploaded = {}
+
+        def fake_upload(filename, blob, **kwargs):
+            with open(filename, "rb") as f:
+                uploaded["data"] = f.read()
+            uploaded["filename"] = filename
+            uploaded.update(kwargs)
+
+        module.transfer_manager.upload_chunks_concurrently.side_effect = fake_upload
+        generator._upload_to_gcs(_image(b"large image"), "Large topic")
+
+        assert uploaded["data"] == b"large image"
+        assert uploaded["worker_type"] == "thread"
+        assert uploaded["chunk_size"] == module.UPLOAD_CHUNK_SIZE
+        assert not os.path.exists(uploaded["filename"])
+        generator.bucket.blob.return_value.upload_from_string.assert_not_called()
+        generator.bucket.blob.return_value.make_public.assert_called_once()
+
+    def test_large_image_without_transfer_manager(self, imagen, monkeypatch):
+        """Older google-cloud-storage falls back to a single-request upload"""
+        module, generator = imagen
+        monkeypatch.setattr(module, "SINGLE_REQUEST_UPLOAD_LIMIT", 4)
+        monkeypatch.setattr(module, "transfer_manager", None)
+        generator._upload_to_gcs(_image(b"large image"), "Large topic")
+        generator.bucket.blob.return_value.upload_from_string.assert_called_once()
+
+
+class TestPromptCache:
+    """Tests for the exact-prompt image cache"""
+
+    def test_repeat_prompt_skips_generation(self, imagen, monkeypatch):
+        """A second identical request returns the cached URL"""
+        module, generator = imagen
+        store = {}
+        monkeypatch.setattr(module, "cache_get", store.get)
+        monkeypatch.setattr(module, "cache_set", lambda key, value, ttl=None: store.__setitem__(key, value))
+        monkeypatch.setattr(generator, "_upload_to_gcs", MagicMock(return_value="https://img/1.png"))
+        generator.model.generate_images.return_value = MagicMock(images=[_image(b"png")])
+
+        first = generator.generate_linkedin_image("Topic", "Headline")
+        second = generator.generate_linkedin_image("Topic", "Headline")
+
+        assert first == second == "https://img/1.png"
+        assert generator.model.generate_images.call_count == 1
+        assert generator.generate_linkedin_image("Other topic") == "https://img/1.png"
+        assert generator.model.generate_images.call_count == 2
+
+
+class TestBatchGeneration:
+    """Tests for ImagenGenerator.generate_linkedin_images"""
+
+    def test_batch_keeps_order_and_caps_concurrency(self, imagen, monkeypatch):
+        """Results follow input order and at most `concurrency` run at once"""
+        import asyncio
+        import threading
+        import time
+
+        module, generator = imagen
+        lock = threading.Lock()
+        in_flight = peak = 0
+
+        def fake_generate(topic, headline=None, **kwargs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return f"https://img/{topic}.png"
+
+        monkeypatch.setattr(generator, "generate_linkedin_image", fake_generate)
+        posts = [{"topic": f"t{i}", "headline": "H"} for i in range(6)]
+        results = asyncio.run(generator.generate_linkedin_images(posts, concurrency=2))
+
+        assert results == [f"https://img/t{i}.png" for i in range(6)]
+        assert peak == 2
+
+
+class TestLazySingleton:
+    """Tests for get_imagen_generator"""
+
+    def test_created_once_on_first_use(self, imagen, monkeypatch):
+        """No generator exists until requested, then the same one is reused"""
+        module, _ = imagen
+        monkeypatch.setattr(module, "_imagen_generator", None)
+        created = []
+        monkeypatch.setattr(module, "ImagenGenerator", lambda: created.append(object()) or created[-1])
+
+        assert module.get_imagen_generator() is module.get_imagen_generator()
+        assert len(created) == 1
+
+    def test_concurrent_first_use_creates_one(self, imagen, monkeypatch):
+        """Threads racing on the first call still share one generator"""
+        import threading
+        import time
+
+        module, _ = imagen
+        monkeypatch.setattr(module, "_imagen_generator", None)
+        created = []
+
+        def slow_generator():
+            time.sleep(0.01)
+            created.append(object())
+            return created[-1]
+
+        monkeypatch.setattr(module, "ImagenGenerator", slow_generator)
+        threads = [threading.Thread(target=module.get_imagen_generator) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(created) == 1
+
+
+class TestBucketLookup:
+    """Tests for resolving the GCS bucket before generation"""
+
+    def test_missing_bucket_skips_generation_and_disables(self, imagen, monkeypatch):
+        """No Vertex call is paid for when the bucket can't be resolved"""
+        module, generator = imagen
+        del generator.bucket  # fall back to the cached_property
+        generator.storage_client.get_bucket.side_effect = PermissionError("denied")
+        generator.storage_client.create_bucket.side_effect = PermissionError("denied")
+        monkeypatch.setattr(module, "cache_get", lambda key: None)
+
+        assert generator.generate_linkedin_image("Topic") is None
+        assert generator.generate_linkedin_image("Topic") is None
+        generator.model.generate_images.assert_not_called()
+        assert generator.enabled is False
+        assert generator.storage_client.get_bucket.call_count == 1
+
+
+class TestVariants:
+    """Tests for ImagenGenerator.generate_linkedin_image_variants"""
+
+    def test_one_model_call_for_all_variants(self, imagen, monkeypatch):
+        """Variants come from a single capped generate_images call"""
+        module, generator = imagen
+        images = [_image(bytes([i])) for i in range(module.MAX_IMAGE_VARIANTS)]
+        generator.model.generate_images.return_value = MagicMock(images=images)
+        monkeypatch.setattr(generator, "_upload_to_gcs",
+                            lambda image, topic: f"https://img/{image._image_bytes[0]}.png")
+
+        urls = generator.generate_linkedin_image_variants("Topic", variants=10)
+
+        assert urls == [f"https://img/{i}.png" for i in range(module.MAX_IMAGE_VARIANTS)]
+        generator.model.generate_images.assert_called_once()
+        assert generator.model.generate_images.call_args.kwargs["number_of_images"] == module.MAX_IMAGE_VARIANTS
@@ -0,0 +1,96 @@
+"""
+Tests for utils/json_parser.py
+
+Run with: pytest tests/test_json_parser.py -v
+"""
+
+import json
+
+import pytest
+
+from utils import json_parser
+from utils.json_parser import _fix_multiline_json_strings, parse_llm_json_response
+
+
+ERROR_PAYLOAD = {"post_text": "Error"}
+
+
+class TestFixMultilineJsonStrings:
+    """Tests for _fix_multiline_json_strings"""
+
+    def test_newlines_inside_strings_are_escaped(self):
+        """Literal newlines in values become \\n; structural ones stay"""
+        text = '{\n    "post_text": "Hello\nworld\r\nthird\rline"\n}'
+        fixed = _fix_multiline_json_strings(text)
+        assert fixed == '{\n    "post_text": "Hello\\nworld\\nthird\\nline"\n}'
+        assert json.loads(fixed) == {"post_text": "Hello\nworld\nthird\nline"}
+
+    def test_escaped_quote_does_not_end_string(self):
+        """An escaped quote keeps the scanner inside the string"""
+        fixed = _fix_multiline_json_strings('{"a": "say \\"hi\\"\nnow"}')
+        assert json.loads(fixed) == {"a": 'say "hi"\nnow'}
+
+    def test_escaped_backslash_before_closing_quote(self):
+        """A trailing \\\\ in a value doesn't swallow the closing quote"""
+        fixed = _fix_multiline_json_strings('{"a": "C:\\\\",\n"b": "x\ny"}')
+        assert json.loads(fixed) == {"a": "C:\\", "b": "x\ny"}
+
+    def test_unterminated_string_is_escaped_to_the_end(self):
+        """Truncated output still gets its trailing newlines escaped"""
+        assert _fix_multiline_json_strings('{"a": "cut\noff') == '{"a": "cut\\noff'
+
+
+class TestParseLlmJsonResponse:
+    """Tests for parse_llm_json_response"""
+
+    def test_markdown_fence_is_stripped(self):
+        """```json fences around the payload are ignored"""
+        text = '```json\n{"post_text": "Hi"}\n```'
+        assert parse_llm_json_response(text, ERROR_PAYLOAD) == {"post_text": "Hi"}
+
+    @pytest.mark.parametrize("text", [
+        '```json\n{"post_text": "Hi"}\n```',
+        '  ```\n\n{"post_text": "Hi"}  \n```\n',
+        '```json{"post_text": "Hi"}```',
+        '{"post_text": "Hi"}\n```',
+    ])
+    def test_fence_variants_are_stripped(self, text):
+        """Opening and closing fences are removed in any combination"""
+        assert parse_llm_json_response(text, ERROR_PAYLOAD) == {"post_text": "Hi"}
+
+    def test_literal_newlines_are_repaired(self):
+        """Multi-line values parse via the newline fixer"""
+        text = '{\n    "post_text": "Hello\nWorld"\n}'
+        assert parse_llm_json_response(text, ERROR_PAYLOAD) == {"post_text": "Hello\nWorld"}
+
+    def test_garbage_returns_default(self):
+        """Unparseable text falls back to the caller's default"""
+        assert parse_llm_json_response("not json at all", ERROR_PAYLOAD) is ERROR_PAYLOAD
+
+    def test_raw_control_characters_fall_back_to_stdlib(self):
+        """Tabs orjson refuses still parse through the lenient path"""
+        assert parse_llm_json_response('{"a": "x\ty"}', ERROR_PAYLOAD) == {"a": "x\ty"}
+
+    @pytest.mark.parametrize("text", ['{"a": [1, 2]}', '```\n{"a": [1, 2]}\n```'])
+    def test_parses_without_orjson(self, monkeypatch, text):
+        """The stdlib path alone gives the same result"""
+        monkeypatch.setattr(json_parser, "orjson", None)
+        assert parse_llm_json_response(text, ERROR_PAYLOAD) == {"a": [1, 2]}
+
+    def test_bare_object_skips_fence_handling(self, monkeypatch):
+        """A response that is just an object never reaches the fence regexes"""
+        monkeypatch.setattr(json_parser, "_FENCE_RE", None)  # would raise if reached
+        assert parse_llm_json_response('{"post_text": "Hi"}', ERROR_PAYLOAD) == {"post_text": "Hi"}
+
+    def test_malformed_object_parsed_by_orjson_once(self, monkeypatch):
+        """Text orjson rejects isn't handed to it a second time"""
+        calls = []
+        real_loads = json_parser.orjson.loads
+        monkeypatch.setattr(json_parser.orjson, "loads", lambda text: calls.append(text) or real_loads(text))
+        assert parse_llm_json_response('{"a": "x\ty"}', ERROR_PAYLOAD) == {"a": "x\ty"}
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize("text", ['[1, 2]', '```json\n[1, 2]\n```'])
+    def test_top_level_array_still_parses(self, text):
+        """Non-object JSON keeps parsing as before"""
+        assert parse_llm_json_response(text, ERROR_PAYLOAD) == [1, 2]
@@ -0,0 +1,36 @@
+"""
+Tests for utils/logger.py
+
+Run with: pytest tests/test_logger.py -v
+"""
+
+import logging
+
+from utils import logger
+
+
+class _Unprintable:
+    """Fails the test if logging ever renders it"""
+
+    def __str__(self):
+        raise AssertionError("message was formatted")
+
+
+class TestLogHelpers:
+    """Tests for log, log_agent_action and log_error"""
+
+    def test_messages_keep_their_format(self, caplog):
+        """The lazy %-style args render the same text as before"""
+        with caplog.at_level(logging.INFO, logger="LinkedInAgent"):
+            logger.log_agent_action("Agent", "Did thing", "details")
+            logger.log_error(ValueError("boom"), "context")
+            logger.log("warned", "WARNING")
+        assert caplog.messages == ["[Agent] Did thing: details", "ERROR in context: boom", "warned"]
+        assert caplog.records[2].levelno == logging.WARNING
+
+    def test_filtered_records_are_never_formatted(self, monkeypatch):
+        """Nothing is built for levels the logger drops"""
+        monkeypatch.setattr(logger._logger, "disabled", True)
+        logger.log_agent_action("Agent", "action", _Unprintable())
+        logger.log_error(_Unprintable(), "context")
+
@@ -0,0 +1,53 @@
+"""
+Tests for the loguru setup in utils/logging_config.py
+
+Run with: pytest tests/test_logging_config.py -v
+"""
+
+import pytest
+from loguru import logger
+
+
+@pytest.fixture
+def logging_config(tmp_path, monkeypatch):
+    """logging_config module logging into a temp dir, unconfigured"""
+    from utils import logging_config
+    monkeypatch.setattr(logging_config, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(logging_config, "_configured", False)
+    monkeypatch.setattr(logging_config, "_sink_ids", [])
+    yield logging_config
+    logging_config._remove_sinks()
+
+
+class TestLazyConfiguration:
+    """Tests for _ensure_configured"""
+
+    def test_sinks_attached_on_first_get_logger(self, logging_config, tmp_path):
+        """Nothing is written until a logger is requested"""
+        assert not list(tmp_path.iterdir())
+        logging_config.get_logger("cis-test").info("hello")
+        logger.complete()
+        logged = "".join(p.read_text() for p in tmp_path.glob("cis_*.log"))
+        assert "cis-test | hello" in logged
+
+    def test_unbound_records_stay_out_of_cis_files(self, logging_config, tmp_path):
+        """Other code's loguru records don't land in the CIS log files"""
+        logging_config.get_logger("cis-test").info("traced")
+        logger.info("no trace")
+        logger.complete()
+        logged = "".join(p.read_text() for p in tmp_path.glob("cis_*.log"))
+        assert "traced" in logged
+        assert "no trace" not in logged
+
+    def test_other_sinks_are_kept(self, logging_config):
+        """Configuring and tearing down only touches this module's sinks"""
+        seen = []
+        sink_id = logger.add(seen.append, format="{message}")
+        try:
+            logging_config.get_logger("cis-test").info("hello")
+            logging_config._remove_sinks()
+            logger.info("after")
+            assert any("hello" in m for m in seen)
+            assert any("after" in m for m in seen)
+        finally:
+            logger.remove(sink_id)
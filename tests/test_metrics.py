@@ -0,0 +1,120 @@
+"""
+Tests for the MetricsTracker in utils/metrics.py
+
+Run with: pytest tests/test_metrics.py -v
+"""
+
+import json
+import time
+
+import pytest
+
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    """metrics module writing to a temp file"""
+    from utils import metrics
+    monkeypatch.setattr(metrics, "METRICS_FILE", tmp_path / "metrics.json")
+    return metrics
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestDeferredSave:
+    """Tests for the debounced metrics flush"""
+
+    def test_track_does_not_write_synchronously(self, metrics, monkeypatch):
+        """A single event only marks the tracker dirty"""
+        monkeypatch.setattr(metrics, "FLUSH_INTERVAL_SECONDS", 60)
+        tracker = metrics.MetricsTracker()
+        tracker.track_generation(True, score=80, duration=1.5)
+        assert not metrics.METRICS_FILE.exists()
+
+        tracker.flush()
+        saved = json.loads(metrics.METRICS_FILE.read_text())
+        assert saved["generations"]["total"] == 1
+        assert saved["generations"]["avg_score"] == 80
+
+    def test_interval_flush_runs_in_background(self, metrics, monkeypatch):
+        """Pending changes are saved once the interval passes"""
+        monkeypatch.setattr(metrics, "FLUSH_INTERVAL_SECONDS", 0.05)
+        tracker = metrics.MetricsTracker()
+        tracker.track_user_signup()
+        assert _wait_for(metrics.METRICS_FILE.exists)
+        assert json.loads(metrics.METRICS_FILE.read_text())["users"]["total_signups"] == 1
+
+    def test_mutation_threshold_forces_flush(self, metrics, monkeypatch):
+        """A burst of events is saved without waiting for the interval"""
+        monkeypatch.setattr(metrics, "FLUSH_INTERVAL_SECONDS", 60)
+        monkeypatch.setattr(metrics, "FLUSH_AFTER_MUTATIONS", 5)
+        tracker = metrics.MetricsTracker()
+        for _ in range(5):
+            tracker.track_generation(False)
+        assert _wait_for(metrics.METRICS_FILE.exists)
+        assert json.loads(metrics.METRICS_FILE.read_text())["generations"]["failed"] == 5
+
+    def test_active_users_saved_as_list(self, metrics):
+        """The in-memory set is serialized without being replaced"""
+        tracker = metrics.MetricsTracker()
+        tracker.track_active_user("u1")
+        tracker.track_active_user("u1")
+        tracker.flush()
+        assert json.loads(metrics.METRICS_FILE.read_text())["users"]["active_today"] == ["u1"]
+        assert isinstance(tracker.metrics["users"]["active_today"], set)
+        assert not metrics.METRICS_FILE.with_suffix(".json.tmp").exists()
+
+
+class TestSampleWindow:
+    """Tests for the bounded score/duration windows"""
+
+    def test_samples_capped_at_window(self, metrics):
+        """Only the last METRICS_WINDOW samples are kept and averaged"""
+        tracker = metrics.MetricsTracker()
+        for score in range(250):
+            tracker.track_generation(True, score=score, duration=1.0)
+        stats = tracker.get_generation_stats()
+        assert stats["avg_score"] == round(sum(range(150, 250)) / 100, 1)
+        assert stats["avg_duration"] == 1.0
+
+        tracker.flush()
+        saved = json.loads(metrics.METRICS_FILE.read_text())
+        assert saved["generations"]["scores"] == list(range(150, 250))
+
+    def test_loaded_history_is_trimmed(self, metrics):
+        """An oversized metrics file from older versions is cut to the window"""
+        tracker = metrics.MetricsTracker()
+        tracker.metrics["generations"]["scores"] = list(range(500))
+        tracker.metrics["generations"]["durations"] = [2.0] * 500
+        metrics.METRICS_FILE.write_text(json.dumps(tracker.metrics, default=list))
+
+        reloaded = metrics.MetricsTracker()
+        assert list(reloaded.metrics["generations"]["scores"]) == list(range(400, 500))
+        reloaded.track_generation(True, score=500, duration=2.0)
+        assert reloaded.get_generation_stats()["avg_score"] == round(sum(range(401, 501)) / 100, 1)
+
+
+class TestDayKey:
+    """Tests for the cached per-day bucket key"""
+
+    def test_key_rolls_over_at_local_midnight(self, metrics, monkeypatch):
+        """Events before and after midnight land in separate days"""
+        from datetime import datetime
+        midnight = datetime(2026, 3, 1).timestamp()
+        tracker = metrics.MetricsTracker()
+
+        monkeypatch.setattr(metrics.time, "time", lambda: midnight - 1)
+        tracker.track_generation(True, score=10)
+        tracker.track_generation(False)
+        monkeypatch.setattr(metrics.time, "time", lambda: midnight + 1)
+        tracker.track_generation(True, score=10)
+
+        by_date = tracker.metrics["generations"]["by_date"]
+        assert by_date["2026-02-28"] == {"success": 1, "failed": 1}
+        assert by_date["2026-03-01"] == {"success": 1, "failed": 0}
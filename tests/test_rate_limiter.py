@@ -0,0 +1,237 @@
+"""
+Tests for utils/rate_limiter.py
+
+Run with: pytest tests/test_rate_limiter.py -v
+"""
+
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+import redis
+
+from utils import rate_limiter
+from utils.cache import RedisCache
+
+
+def _memory_cache() -> RedisCache:
+    cache = RedisCache.__new__(RedisCache)
+    cache.redis_url = None
+    cache.fallback_to_memory = True
+    cache.client = None
+    cache.memory_cache = {}
+    cache.using_fallback = True
+    return cache
+
+
+@pytest.fixture
+def memory_limiter(monkeypatch):
+    """RateLimiter on the in-memory cache fallback"""
+    monkeypatch.setattr(rate_limiter, "get_cache", _memory_cache)
+    return rate_limiter.RateLimiter()
+
+
+@pytest.fixture
+def redis_limiter(monkeypatch):
+    """RateLimiter wired to a mock Redis client"""
+    cache = MagicMock(using_fallback=False)
+    monkeypatch.setattr(rate_limiter, "get_cache", lambda: cache)
+    return rate_limiter.RateLimiter(), cache.client
+
+
+class TestSlidingWindowMemory:
+    """Tests for check_rate_limit on the in-memory fallback"""
+
+    def test_blocks_after_limit(self, memory_limiter):
+        """The request past max_requests is denied with a retry time"""
+        results = [memory_limiter.check_rate_limit("u", 3, 60, "r") for _ in range(4)]
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert results[2][1]['remaining'] == 0
+        assert 0 < results[3][1]['retry_after'] <= 60
+
+    def test_reset_clears_window(self, memory_limiter):
+        """reset_limit lets the identifier through again"""
+        for _ in range(2):
+            memory_limiter.check_rate_limit("u", 2, 60, "r")
+        memory_limiter.reset_limit("u", "r")
+        assert memory_limiter.check_rate_limit("u", 2, 60, "r")[0]
+
+
+class TestSlidingWindowRedis:
+    """Tests for the sorted-set + Lua sliding window"""
+
+    def test_evalsha_without_script_load(self, redis_limiter):
+        """A single EVALSHA per check using the SHA computed at import"""
+        limiter, client = redis_limiter
+        client.evalsha.return_value = [1, 1, 0]
+
+        allowed, info = limiter.check_rate_limit("u", 5, 60, "r")
+        limiter.check_rate_limit("u", 5, 60, "r")
+
+        assert allowed and info['remaining'] == 4
+        client.script_load.assert_not_called()
+        assert client.evalsha.call_count == 2
+        sha, numkeys, key, now_ms, window_ms, limit, member = client.evalsha.call_args.args
+        expected_sha = hashlib.sha1(rate_limiter._SLIDING_WINDOW_LUA.encode()).hexdigest()
+        assert (sha, numkeys, key, window_ms, limit) == (expected_sha, 1, "rate_limit:r:u:z", 60000, 5)
+
+    def test_denial_uses_oldest_entry(self, redis_limiter, monkeypatch):
+        """retry_after and reset_at come from the oldest request in the window"""
+        limiter, client = redis_limiter
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: 1000.0)
+        client.evalsha.return_value = [0, 5, 970_500]
+
+        allowed, info = limiter.check_rate_limit("u", 5, 60, "r")
+
+        assert not allowed
+        assert info['reset_at'] == 1030
+        assert info['retry_after'] == 31
+
+    def test_noscript_falls_back_to_eval(self, redis_limiter):
+        """A flushed script cache is handled with EVAL"""
+        limiter, client = redis_limiter
+        client.evalsha.side_effect = redis.exceptions.NoScriptError("NOSCRIPT")
+        client.eval.return_value = [1, 1, 0]
+
+        assert limiter.check_rate_limit("u", 5, 60, "r")[0]
+        client.eval.assert_called_once()
+
+
+class TestFixedWindow:
+    """Tests for check_fixed_window and the convenience limits"""
+
+    def test_counter_over_limit_is_denied(self, redis_limiter):
+        """Counts past max_requests are denied until the key expires"""
+        limiter, client = redis_limiter
+        client.evalsha.side_effect = [[3, 1200], [4, 1199]]
+
+        allowed, info = limiter.check_fixed_window("u", 3, 3600, "r")
+        assert allowed and info['remaining'] == 0
+        allowed, info = limiter.check_fixed_window("u", 3, 3600, "r")
+        assert not allowed and info['retry_after'] == 1199
+        assert client.evalsha.call_args.args[2:] == ("rate_limit:r:u:w", 3600)
+
+    def test_memory_fallback_uses_sliding_window(self, memory_limiter):
+        """Without Redis the bounded sliding window enforces the limit"""
+        results = [memory_limiter.check_fixed_window("u", 2, 60, "r")[0] for _ in range(3)]
+        assert results == [True, True, False]
+
+    def test_generation_limit_routes_to_fixed_window(self, monkeypatch):
+        """Convenience limits use the fixed window counter"""
+        limiter = MagicMock()
+        monkeypatch.setattr(rate_limiter, "get_rate_limiter", lambda: limiter)
+        rate_limiter.check_generation_limit("user")
+        limiter.check_fixed_window.assert_called_once_with(
+            identifier="user", max_requests=10, window_seconds=3600, resource="generation"
+        )
+
+
+class TestDenyCache:
+    """Tests for the in-process cache of active denials"""
+
+    def test_repeat_denial_skips_redis(self, redis_limiter):
+        """Once denied, checks are answered locally until the reset time"""
+        limiter, client = redis_limiter
+        client.evalsha.return_value = [4, 600]
+
+        first = limiter.check_fixed_window("u", 3, 3600, "r")
+        second = limiter.check_fixed_window("u", 3, 3600, "r")
+
+        assert not first[0] and not second[0]
+        assert second[1]['reset_at'] == first[1]['reset_at']
+        assert 599 <= second[1]['retry_after'] <= 600
+        assert client.evalsha.call_count == 1
+
+    def test_expired_denial_checks_again(self, memory_limiter, monkeypatch):
+        """After the reset time the shared state is consulted again"""
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+        for _ in range(2):
+            memory_limiter.check_rate_limit("u", 1, 60, "r")
+        assert memory_limiter._deny_cache == {"rate_limit:r:u": (1060, 1000 + rate_limiter.DENY_CACHE_SECONDS)}
+
+        clock[0] = 1060.0
+        assert memory_limiter.check_rate_limit("u", 1, 60, "r")[0]
+        assert memory_limiter._deny_cache == {}
+
+    def test_denial_cached_briefly(self, redis_limiter, monkeypatch):
+        """A long window is re-checked after DENY_CACHE_SECONDS, e.g. to see
+        a reset_limit() made by another worker"""
+        limiter, client = redis_limiter
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+        client.evalsha.side_effect = [[4, 3600], [1, 3600]]
+
+        assert not limiter.check_fixed_window("u", 3, 3600, "r")[0]
+        clock[0] += rate_limiter.DENY_CACHE_SECONDS - 1
+        assert not limiter.check_fixed_window("u", 3, 3600, "r")[0]
+        assert client.evalsha.call_count == 1
+
+        clock[0] += 1
+        assert limiter.check_fixed_window("u", 3, 3600, "r")[0]
+        assert client.evalsha.call_count == 2
+
+    def test_reset_limit_clears_denial(self, memory_limiter):
+        for _ in range(2):
+            memory_limiter.check_rate_limit("u", 1, 60, "r")
+        memory_limiter.reset_limit("u", "r")
+        assert memory_limiter.check_rate_limit("u", 1, 60, "r")[0]
+
+    def test_cache_size_is_bounded(self, memory_limiter, monkeypatch):
+        monkeypatch.setattr(rate_limiter, "DENY_CACHE_SIZE", 3)
+        for i in range(5):
+            memory_limiter._remember_denial(f"k{i}", 10 ** 12)
+        assert len(memory_limiter._deny_cache) <= 3
+
+
+class TestMemoryWindowTrim:
+    """Tests for trimming the in-memory timestamp list"""
+
+    def test_only_expired_prefix_is_dropped(self, memory_limiter, monkeypatch):
+        """Timestamps at or before the window start are removed"""
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: 1000.0)
+        memory_limiter.cache.set("rate_limit:r:u", [900, 939, 940, 941, 999])
+
+        allowed, info = memory_limiter.check_rate_limit("u", 10, 60, "r")
+
+        assert allowed
+        assert memory_limiter.cache.get("rate_limit:r:u") == [941, 999, 1000]
+        assert info['remaining'] == 7
+
+
+class TestTokenBucket:
+    """Tests for check_token_bucket on the in-memory fallback"""
+
+    def test_burst_then_refill(self, memory_limiter, monkeypatch):
+        """Capacity allows a burst; tokens come back at refill_rate"""
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+
+        results = [memory_limiter.check_token_bucket("u", 2, 0.5, "r")[0] for _ in range(3)]
+        assert results == [True, True, False]
+
+        clock[0] = 1002.0
+        allowed, info = memory_limiter.check_token_bucket("u", 2, 0.5, "r")
+        assert allowed and info['tokens_remaining'] == 0
+
+    def test_full_bucket_after_idle(self, memory_limiter, monkeypatch):
+        """A long-idle full bucket never exceeds capacity"""
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+        memory_limiter.cache.set("token_bucket:r:u", {'tokens': 5, 'last_refill': 0})
+
+        allowed, info = memory_limiter.check_token_bucket("u", 5, 1.0, "r")
+        assert allowed and info['tokens_remaining'] == 4
+
+    def test_redis_bucket_runs_in_one_script(self, redis_limiter):
+        """With Redis the refill and take happen in a single EVALSHA"""
+        limiter, client = redis_limiter
+        client.evalsha.side_effect = [[1, "2.5"], [0, "0.25"]]
+
+        allowed, info = limiter.check_token_bucket("u", 5, 0.5, "r")
+        assert allowed and info['tokens_remaining'] == 2
+        assert client.evalsha.call_args.args[2:5] == ("token_bucket:r:u:h", 5, 0.5)
+
+        allowed, info = limiter.check_token_bucket("u", 5, 0.5, "r")
+        assert not allowed and info['retry_after'] == 2
+        assert not limiter.cache.get.called
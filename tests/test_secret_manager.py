@@ -0,0 +1,87 @@
+"""
+Tests for utils/secret_manager.py
+
+Run with: pytest tests/test_secret_manager.py -v
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils import secret_manager
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Mock Secret Manager client returning "value-<secret name>" """
+    client = MagicMock()
+    client.access_secret_version.side_effect = lambda request: MagicMock(
+        payload=MagicMock(data=f"value-{request['name'].split('/')[3]}\n".encode())
+    )
+    secretmanager = MagicMock()
+    secretmanager.SecretManagerServiceClient.return_value = client
+    monkeypatch.setattr(secret_manager, "secretmanager", secretmanager, raising=False)
+    monkeypatch.setattr(secret_manager, "SECRET_MANAGER_AVAILABLE", True)
+    monkeypatch.setattr(secret_manager, "_client", None)
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "proj")
+    monkeypatch.delenv("TEST_SECRET", raising=False)
+    secret_manager._fetch_secret.cache_clear()
+    yield client
+    secret_manager._fetch_secret.cache_clear()
+
+
+class TestGetSecret:
+    """Tests for get_secret"""
+
+    def test_env_var_wins(self, client, monkeypatch):
+        """Environment variables are used without calling Secret Manager"""
+        monkeypatch.setenv("TEST_SECRET", "from-env")
+        assert secret_manager.get_secret("TEST_SECRET") == "from-env"
+        client.access_secret_version.assert_not_called()
+
+    def test_value_and_client_are_cached(self, client):
+        """Repeat lookups reuse both the client and the fetched value"""
+        assert secret_manager.get_secret("TEST_SECRET") == "value-TEST_SECRET"
+        assert secret_manager.get_secret("TEST_SECRET") == "value-TEST_SECRET"
+        secret_manager.get_secret("OTHER_SECRET")
+        assert client.access_secret_version.call_count == 2
+        secret_manager.secretmanager.SecretManagerServiceClient.assert_called_once()
+
+    def test_failures_fall_back_and_are_retried(self, client):
+        """A failed fetch returns the default and is not cached"""
+        client.access_secret_version.side_effect = RuntimeError("unavailable")
+        assert secret_manager.get_secret("TEST_SECRET", default="fallback") == "fallback"
+        assert secret_manager.get_secret("TEST_SECRET", default="fallback") == "fallback"
+        assert client.access_secret_version.call_count == 2
+
+
+class TestLoadStripeSecrets:
+    """Tests for load_stripe_secrets"""
+
+    def test_fetches_concurrently_in_order(self, client, monkeypatch):
+        """All secrets are fetched in parallel and keyed by name"""
+        import threading
+        import time
+
+        for name in secret_manager.STRIPE_SECRET_NAMES:
+            monkeypatch.delenv(name, raising=False)
+        lock = threading.Lock()
+        in_flight = peak = 0
+        fetch = client.access_secret_version.side_effect
+
+        def slow_fetch(request):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return fetch(request)
+
+        client.access_secret_version.side_effect = slow_fetch
+        secrets = secret_manager.load_stripe_secrets()
+
+        assert list(secrets) == list(secret_manager.STRIPE_SECRET_NAMES)
+        assert secrets["STRIPE_SECRET_KEY"] == "value-STRIPE_SECRET_KEY"
+        assert peak > 1
@@ -0,0 +1,388 @@
+"""
+Tests for utils/supabase_storage.py
+
+Run with: pytest tests/test_supabase_storage.py -v
+"""
+
+import concurrent.futures
+import hashlib
+import io
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils import supabase_storage
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Mock Supabase client whose uploads succeed"""
+    client = MagicMock()
+    client.storage.from_.return_value.upload.return_value = MagicMock(error=None)
+    client.storage.from_.return_value.exists.return_value = False
+    client.storage.from_.return_value.get_public_url.side_effect = (
+        lambda path: f"https://x.supabase.co/storage/v1/object/public/images/{path}"
+    )
+    monkeypatch.setattr(supabase_storage, "_supabase_client", client)
+    monkeypatch.setattr(supabase_storage, "_verified_buckets", set())
+    supabase_storage._public_url.cache_clear()
+    return client
+
+
+@pytest.fixture
+def cleanup(monkeypatch):
+    """Private cleanup executor the test can drain before checking the disk"""
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(supabase_storage, "_cleanup_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+class TestGetContentType:
+    """Tests for get_content_type"""
+
+    @pytest.mark.parametrize("ext, expected", [
+        (".png", "image/png"), (".JPG", "image/jpeg"), (".webp", "image/webp"), (".tiff", "image/png"),
+    ])
+    def test_lookup(self, ext, expected):
+        assert supabase_storage.get_content_type(ext) == expected
+
+    def test_upper_case_extension_normalized_once(self, client):
+        """Key suffix and content-type both come from the lowercased extension"""
+        upload = client.storage.from_.return_value.upload
+        supabase_storage.upload_image_bytes_to_supabase(b"jpg", ext=".JPG")
+        assert upload.call_args.kwargs["path"].endswith(".jpg")
+        assert upload.call_args.kwargs["file_options"]["content-type"] == "image/jpeg"
+
+
+class TestGetSupabaseClient:
+    """Tests for the storage client singleton"""
+
+    def test_client_uses_keepalive_pool(self, monkeypatch):
+        """The SDK is handed one pooled HTTP/2 client for its requests"""
+        monkeypatch.setattr(supabase_storage, "_supabase_client", None)
+        monkeypatch.setenv("SUPABASE_URL", "https://x.supabase.co")
+        monkeypatch.setenv("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.e30.x")
+
+        client = supabase_storage.get_supabase_client()
+
+        http_client = client.storage.session
+        assert client.storage.from_("images")._client is http_client
+        pool = http_client._transport._pool
+        assert pool._max_keepalive_connections == supabase_storage.MAX_KEEPALIVE_CONNECTIONS
+        assert pool._keepalive_expiry == supabase_storage.KEEPALIVE_EXPIRY_SECONDS
+        assert pool._http2
+        assert supabase_storage.get_supabase_client() is client
+
+    def test_existing_client_skips_the_lock(self, client, monkeypatch):
+        """Steady-state calls don't serialize on the creation lock"""
+        lock = MagicMock()
+        monkeypatch.setattr(supabase_storage, "_client_lock", lock)
+        assert supabase_storage.get_supabase_client() is client
+        lock.__enter__.assert_not_called()
+
+
+class TestUploadImageToSupabase:
+    """Tests for upload_image_to_supabase"""
+
+    def test_file_is_streamed_not_read(self, client, tmp_path, cleanup):
+        """The open file handle goes to the SDK and the local copy is removed"""
+        path = tmp_path / "image.png"
+        path.write_bytes(b"png-data")
+        sent = {}
+
+        def fake_upload(path, file, file_options):
+            sent["type"] = type(file)
+            sent["data"] = file.read()
+            sent["path"] = path
+
+        client.storage.from_.return_value.upload.side_effect = fake_upload
+        url = supabase_storage.upload_image_to_supabase(str(path), "technical")
+
+        assert sent["type"] is io.BufferedReader
+        assert sent["data"] == b"png-data"
+        assert url.endswith(sent["path"])
+        cleanup.shutdown(wait=True)
+        assert not path.exists()
+
+    def test_local_copy_kept_when_requested(self, client, tmp_path, cleanup):
+        path = tmp_path / "image.png"
+        path.write_bytes(b"png-data")
+        assert supabase_storage.upload_image_to_supabase(str(path), cleanup_local=False)
+        cleanup.shutdown(wait=True)
+        assert path.exists()
+
+    def test_cleanup_failure_is_not_raised(self, caplog, tmp_path):
+        """A file that is already gone is reported, not raised"""
+        supabase_storage._remove_local_file(str(tmp_path / "gone.png"))
+        assert "Could not remove" in caplog.text
+
+    def test_missing_file_returns_none(self, client, tmp_path):
+        assert supabase_storage.upload_image_to_supabase(str(tmp_path / "nope.png")) is None
+        client.storage.from_.return_value.upload.assert_not_called()
+
+
+class TestUploadImageToSupabaseAsync:
+    """Tests for upload_image_to_supabase_async"""
+
+    def test_upload_runs_off_the_event_loop(self, client, tmp_path, cleanup):
+        import asyncio
+        import threading
+
+        path = tmp_path / "image.png"
+        path.write_bytes(b"png-data")
+        threads = []
+        client.storage.from_.return_value.upload.side_effect = (
+            lambda **kwargs: threads.append(threading.current_thread()) or MagicMock(error=None)
+        )
+
+        url = asyncio.run(supabase_storage.upload_image_to_supabase_async(str(path), "technical"))
+
+        assert url.startswith("https://x.supabase.co/storage/v1/object/public/images/technical/")
+        assert threads and threads[0].name.startswith("supabase-upload")
+
+
+class TestUploadMany:
+    """Tests for upload_many"""
+
+    def test_uploads_overlap_up_to_the_limit(self, monkeypatch):
+        """Results keep input order, failures become None, concurrency is capped"""
+        import asyncio
+        import threading
+        import time
+
+        lock = threading.Lock()
+        in_flight = peak = 0
+
+        def fake_upload(local_path, style, cleanup_local):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            if local_path == "bad.png":
+                raise RuntimeError("boom")
+            return f"https://img/{local_path}"
+
+        monkeypatch.setattr(supabase_storage, "upload_image_to_supabase", fake_upload)
+        monkeypatch.setattr(supabase_storage, "MAX_CONCURRENT_UPLOADS", 2)
+        paths = ["a.png", "bad.png", "c.png", "d.png", "e.png"]
+
+        urls = asyncio.run(supabase_storage.upload_many(paths, "technical"))
+
+        assert urls == ["https://img/a.png", None, "https://img/c.png", "https://img/d.png", "https://img/e.png"]
+        assert peak == 2
+
+
+def _status_error(status: int, headers: dict | None = None) -> Exception:
+    """StorageApiError chained to an httpx error, as storage3 raises it"""
+    import httpx
+    from storage3.exceptions import StorageApiError
+
+    request = httpx.Request("POST", "https://x.supabase.co/storage/v1/object/images/a.png")
+    response = httpx.Response(status, headers=headers, request=request)
+    error = StorageApiError("failed", "Error", status)
+    error.__cause__ = httpx.HTTPStatusError("failed", request=request, response=response)
+    return error
+
+
+class TestUploadRetry:
+    """Tests for retrying transient upload failures"""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(supabase_storage.time, "sleep", sleeps.append)
+        return sleeps
+
+    def test_transient_errors_are_retried(self, client, no_sleep):
+        """A 503 and a dropped connection are retried with the same key"""
+        import httpx
+
+        upload = client.storage.from_.return_value.upload
+        upload.side_effect = [_status_error(503), httpx.ConnectError("reset"), MagicMock(error=None)]
+
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is not None
+        assert upload.call_count == 3
+        assert len({c.kwargs["path"] for c in upload.call_args_list}) == 1
+        assert len(no_sleep) == 2
+
+    def test_retry_after_is_honored(self, client, no_sleep):
+        upload = client.storage.from_.return_value.upload
+        upload.side_effect = [_status_error(429, {"Retry-After": "3"}), MagicMock(error=None)]
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is not None
+        assert no_sleep == [3.0]
+
+    def test_client_errors_are_not_retried(self, client, no_sleep, caplog):
+        upload = client.storage.from_.return_value.upload
+        upload.side_effect = _status_error(400)
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is None
+        assert upload.call_count == 1
+        assert caplog.records[-1].message == "[STORAGE] Upload failed"
+        assert caplog.records[-1].exc_info is not None
+
+    def test_gives_up_after_max_attempts(self, client, no_sleep):
+        upload = client.storage.from_.return_value.upload
+        upload.side_effect = _status_error(502)
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is None
+        assert upload.call_count == supabase_storage.UPLOAD_MAX_ATTEMPTS
+
+    def test_stream_is_rewound_between_attempts(self, client, no_sleep):
+        sent = []
+
+        def flaky_upload(path, file, file_options):
+            sent.append(file.read())
+            if len(sent) == 1:
+                raise _status_error(500)
+            return MagicMock(error=None)
+
+        client.storage.from_.return_value.upload.side_effect = flaky_upload
+        assert supabase_storage.upload_image_bytes_to_supabase(io.BytesIO(b"png-data")) is not None
+        assert sent == [b"png-data", b"png-data"]
+
+
+class TestEnsureBucket:
+    """Tests for the cached bucket check"""
+
+    def test_bucket_listed_once(self, client):
+        """Only the first upload asks Supabase whether the bucket exists"""
+        for _ in range(3):
+            supabase_storage.upload_image_bytes_to_supabase(b"png")
+        client.storage.get_bucket.assert_called_once_with("images")
+        client.storage.list_buckets.assert_not_called()
+        client.storage.create_bucket.assert_not_called()
+
+    @pytest.mark.parametrize("status", [404, "400"])
+    def test_missing_bucket_is_created(self, client, status):
+        from storage3.exceptions import StorageApiError
+
+        client.storage.get_bucket.side_effect = StorageApiError("Bucket not found", "Error", status)
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is not None
+        client.storage.create_bucket.assert_called_once_with("images", options={"public": True})
+
+    def test_lookup_error_does_not_create(self, client):
+        """Auth or server errors aren't mistaken for a missing bucket"""
+        from storage3.exceptions import StorageApiError
+
+        client.storage.get_bucket.side_effect = StorageApiError("Unauthorized", "Error", 403)
+        supabase_storage.upload_image_bytes_to_supabase(b"png")
+        client.storage.create_bucket.assert_not_called()
+
+    def test_create_race_is_tolerated(self, client):
+        """A bucket created concurrently elsewhere doesn't fail the upload"""
+        from storage3.exceptions import StorageApiError
+
+        client.storage.get_bucket.side_effect = StorageApiError("Bucket not found", "Error", 404)
+        client.storage.create_bucket.side_effect = RuntimeError("already exists")
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is not None
+        assert "images" in supabase_storage._verified_buckets
+
+
+class TestObjectNames:
+    """Tests for generated storage keys"""
+
+    def test_names_are_content_hashes_and_sanitized(self, client):
+        """Each image gets a key derived from its bytes under the sanitized style folder"""
+        upload = client.storage.from_.return_value.upload
+        for data in (b"png-1", b"png-2", b"png-3"):
+            supabase_storage.upload_image_bytes_to_supabase(data, "../etc", ".png")
+        names = [c.kwargs["path"] for c in upload.call_args_list]
+        assert len(set(names)) == 3
+        assert all(name.startswith("__etc/") and name.endswith(".png") for name in names)
+        assert names[0] == f"__etc/{hashlib.blake2b(b'png-1', digest_size=16).hexdigest()}.png"
+
+    def test_stream_and_bytes_get_the_same_key(self, client):
+        """A streamed file is hashed, then rewound for the upload"""
+        sent = []
+        upload = client.storage.from_.return_value.upload
+        upload.side_effect = lambda path, file, file_options: sent.append(
+            (path, file if isinstance(file, bytes) else file.read())
+        ) or MagicMock(error=None)
+
+        supabase_storage.upload_image_bytes_to_supabase(b"png-data")
+        supabase_storage.upload_image_bytes_to_supabase(io.BufferedReader(io.BytesIO(b"png-data")))
+
+        assert sent[0] == sent[1]
+
+
+class TestSanitizeStyle:
+    """Tests for _sanitize_style"""
+
+    @pytest.mark.parametrize("style, expected", [
+        ("technical", "technical"),
+        ("a/b\\c", "a_b_c"),
+        ("x..y....z", "x_y_z"),
+        ("../../etc", "____etc"),
+        (".hidden", "general"),
+        ("", "general"),
+    ])
+    def test_separators_and_dot_runs_replaced(self, style, expected):
+        assert supabase_storage._sanitize_style(style) == expected
+
+
+class TestDeduplication:
+    """Tests for skipping uploads of already stored images"""
+
+    def test_existing_object_is_not_reuploaded(self, client):
+        bucket = client.storage.from_.return_value
+        bucket.exists.return_value = True
+        url = supabase_storage.upload_image_bytes_to_supabase(b"png", "technical")
+        bucket.upload.assert_not_called()
+        assert url == f"https://x.supabase.co/storage/v1/object/public/images/{bucket.exists.call_args.args[0]}"
+
+    def test_public_url_built_once_per_key(self, client):
+        bucket = client.storage.from_.return_value
+        bucket.exists.return_value = True
+        urls = {supabase_storage.upload_image_bytes_to_supabase(b"png") for _ in range(3)}
+        assert len(urls) == 1
+        bucket.get_public_url.assert_called_once()
+
+    def test_failed_exists_check_still_uploads(self, client):
+        bucket = client.storage.from_.return_value
+        bucket.exists.side_effect = RuntimeError("HEAD failed")
+        assert supabase_storage.upload_image_bytes_to_supabase(b"png") is not None
+        bucket.upload.assert_called_once()
+
+
+class TestDeleteImage:
+    """Tests for delete_image_from_supabase"""
+
+    @pytest.mark.parametrize("url, bucket, path", [
+        ("https://x.supabase.co/storage/v1/object/public/images/tech/a.png", "images", "tech/a.png"),
+        ("https://x.supabase.co/storage/v1/object/public/images/tech/a.png?v=123", "images", "tech/a.png"),
+        ("https://x.supabase.co/storage/v1/object/public/avatars/u/b.jpg#top", "avatars", "u/b.jpg"),
+    ])
+    def test_bucket_and_path_parsed_from_url(self, client, url, bucket, path):
+        client.storage.from_.return_value.remove.return_value = MagicMock(error=None)
+        assert supabase_storage.delete_image_from_supabase(url) is True
+        client.storage.from_.assert_called_with(bucket)
+        client.storage.from_.return_value.remove.assert_called_once_with([path])
+
+    def test_foreign_url_is_ignored(self, client):
+        assert supabase_storage.delete_image_from_supabase("https://cdn.example.com/a.png") is False
+        client.storage.from_.return_value.remove.assert_not_called()
+
+
+class TestDeleteImages:
+    """Tests for delete_images_from_supabase"""
+
+    def test_batched_per_bucket(self, client, monkeypatch):
+        """One remove call per bucket and batch; foreign URLs are skipped"""
+        monkeypatch.setattr(supabase_storage, "_MAX_REMOVE_BATCH", 2)
+        base = "https://x.supabase.co/storage/v1/object/public"
+        urls = [f"{base}/images/a.png", f"{base}/images/b.png?v=1", f"{base}/images/c.png",
+                f"{base}/avatars/d.png", "https://cdn.example.com/e.png"]
+        removed = []
+        client.storage.from_.side_effect = lambda bucket: MagicMock(
+            remove=lambda paths: removed.append((bucket, paths)) or MagicMock(error=None)
+        )
+
+        assert supabase_storage.delete_images_from_supabase(urls) == 4
+        assert removed == [("images", ["a.png", "b.png"]), ("images", ["c.png"]), ("avatars", ["d.png"])]
+
+    def test_failed_batch_is_not_counted(self, client):
+        client.storage.from_.return_value.remove.side_effect = RuntimeError("boom")
+        url = "https://x.supabase.co/storage/v1/object/public/images/a.png"
+        assert supabase_storage.delete_images_from_supabase([url]) == 0
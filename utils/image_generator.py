@@ -1,48 +1,77 @@
 import os
-import textwrap
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import importlib.util
+import itertools
+import string
 import re
+import threading
+import time
 from PIL import Image, ImageDraw, ImageFont
-import uuid
-from datetime import datetime
-import emoji
-import base64
+from pathlib import Path
 import io
 
 # Import Supabase Storage for persistent image URLs
 try:
-    from utils.supabase_storage import upload_image_to_supabase
+    from utils.supabase_storage import upload_image_to_supabase, upload_image_bytes_to_supabase
     SUPABASE_STORAGE_AVAILABLE = True
 except ImportError:
     try:
-        from supabase_storage import upload_image_to_supabase
+        from supabase_storage import upload_image_to_supabase, upload_image_bytes_to_supabase
         SUPABASE_STORAGE_AVAILABLE = True
     except ImportError:
         SUPABASE_STORAGE_AVAILABLE = False
         print("[IMAGE] Supabase storage not available - using local storage")
 
-# Try to import google genai for Nano Banana support
+# Nano Banana support needs google-genai; the SDK itself is heavy, so only
+# probe for it here and import it on first use (see _load_genai)
 try:
-    from google import genai
-    from google.genai import types
-    NANO_BANANA_AVAILABLE = True
+    NANO_BANANA_AVAILABLE = importlib.util.find_spec("google.genai") is not None
 except ImportError:
     NANO_BANANA_AVAILABLE = False
+genai = None
+types = None
 
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "assets")
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "outputs")
 
-def _upload_or_fallback(local_path: str, style: str) -> str:
+
+# PNG encoding and uploads that run off the caller's thread
+_IO_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="image-io")
+
+# Per-process sequence for output filenames; next() on a count is atomic
+_FILENAME_COUNTER = itertools.count()
+
+
+def _new_output_path(prefix: str) -> str:
+    """Return a fresh, collision-free PNG path in OUTPUT_DIR.
+
+    Nanosecond time plus pid and a process-local counter is unique across
+    threads and workers sharing the directory, without datetime formatting
+    or an OS randomness read per image.
+    """
+    filename = f"{prefix}_{time.time_ns()}_{os.getpid()}_{next(_FILENAME_COUNTER):x}.png"
+    return os.path.join(OUTPUT_DIR, filename)
+
+
+def _upload_or_fallback(local_path: str, style: str, cleanup_local: bool = True) -> str:
     """
     Upload image to Supabase if available, otherwise return local path.
     
     Args:
         local_path: Local file system path to the image
         style: Style category for organizing uploads
+        cleanup_local: Delete the local file after a successful upload
         
     Returns:
         Public URL if upload succeeds, otherwise local absolute path
     """
     if SUPABASE_STORAGE_AVAILABLE:
         try:
-            public_url = upload_image_to_supabase(local_path, style)
+            public_url = upload_image_to_supabase(local_path, style, cleanup_local=cleanup_local)
             if public_url:
                 return public_url
         except Exception as e:
@@ -50,8 +79,160 @@ def _upload_or_fallback(local_path: str, style: str) -> str:
     
     return os.path.abspath(local_path)
 
+
+# Background uploads keyed by the local path handed back to the caller
+_PENDING_UPLOADS: dict[str, concurrent.futures.Future] = {}
+_MAX_PENDING_UPLOADS = 256
+_pending_lock = threading.Lock()
+
+
+def _upload_in_background(local_path: str, style: str, cache_key: str | None = None) -> str:
+    """
+    Start uploading on the I/O pool and return the local path immediately.
+
+    The local file is kept so the returned path stays servable; the public
+    URL can be collected later with ``get_public_url``.
+    """
+    abs_path = os.path.abspath(local_path)
+    if not SUPABASE_STORAGE_AVAILABLE:
+        return abs_path
+
+    def _upload() -> str:
+        url = _upload_or_fallback(abs_path, style, cleanup_local=False)
+        if cache_key:
+            _store_cached_output(cache_key, url)
+        return url
+
+    future = _IO_POOL.submit(_upload)
+    with _pending_lock:
+        # Drop finished uploads nobody collected so the dict stays bounded
+        if len(_PENDING_UPLOADS) >= _MAX_PENDING_UPLOADS:
+            for path, pending in list(_PENDING_UPLOADS.items()):
+                if pending.done():
+                    del _PENDING_UPLOADS[path]
+        _PENDING_UPLOADS[abs_path] = future
+    return abs_path
+
+
+async def get_public_url(local_path: str) -> str:
+    """
+    Wait for a background upload started with ``upload_in_background=True``.
+
+    Args:
+        local_path: Path returned by the image generator
+
+    Returns:
+        Public URL once uploaded, or the local path if no upload is pending
+        or the upload failed
+    """
+    with _pending_lock:
+        future = _PENDING_UPLOADS.pop(os.path.abspath(local_path), None)
+    if future is None:
+        return local_path
+    return await asyncio.wrap_future(future)
+
+
+# Finished image URL/path keyed by a hash of the render inputs, least
+# recently used first. Public URLs are mirrored to "<hash>.url" sidecar
+# files in IMAGE_CACHE_DIR (outside the served static tree) so they survive
+# restarts; local paths only mean something to this process.
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".cache", "image_urls")
+)
+IMAGE_URL_CACHE_SIZE = 512
+# Bounds how long a deleted or replaced image can be handed back
+IMAGE_URL_CACHE_TTL_SECONDS = 24 * 60 * 60
+_IMAGE_URL_CACHE: collections.OrderedDict[str, tuple[str, float]] = collections.OrderedDict()
+_image_cache_lock = threading.Lock()
+
+
+def _output_cache_key(*parts: str) -> str:
+    """Hash the inputs that fully determine an image."""
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _sidecar_path(key: str) -> str:
+    return os.path.join(IMAGE_CACHE_DIR, f"{key}.url")
+
+
+def _remember_output(key: str, url: str, stored_at: float) -> None:
+    """Insert or refresh an entry, evicting the least recently used."""
+    with _image_cache_lock:
+        _IMAGE_URL_CACHE[key] = (url, stored_at)
+        _IMAGE_URL_CACHE.move_to_end(key)
+        while len(_IMAGE_URL_CACHE) > IMAGE_URL_CACHE_SIZE:
+            _IMAGE_URL_CACHE.popitem(last=False)
+
+
+def _forget_output(key: str) -> None:
+    with _image_cache_lock:
+        _IMAGE_URL_CACHE.pop(key, None)
+    try:
+        os.remove(_sidecar_path(key))
+    except OSError:
+        pass
+
+
+def _get_cached_output(key: str) -> str | None:
+    """Return a previously generated URL/path for this key, if still valid."""
+    with _image_cache_lock:
+        entry = _IMAGE_URL_CACHE.get(key)
+    if entry is None:
+        sidecar = _sidecar_path(key)
+        try:
+            stored_at = os.path.getmtime(sidecar)
+            with open(sidecar, encoding="utf-8") as f:
+                entry = (f.read().strip(), stored_at)
+        except OSError:
+            return None
+
+    url, stored_at = entry
+    # Expired entries are dropped; local fallbacks are only reusable while
+    # the file is still on disk
+    if (not url or time.time() - stored_at > IMAGE_URL_CACHE_TTL_SECONDS
+            or (not url.startswith("http") and not os.path.exists(url))):
+        _forget_output(key)
+        return None
+
+    _remember_output(key, url, stored_at)
+    return url
+
+
+def _store_cached_output(key: str, url: str | None) -> None:
+    """Remember a generated URL/path in memory, and public URLs on disk."""
+    if not url:
+        return
+    _remember_output(key, url, time.time())
+    if not url.startswith("http"):
+        return
+    try:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        with open(_sidecar_path(key), "w", encoding="utf-8") as f:
+            f.write(url)
+    except OSError as e:
+        print(f"[WARN] Could not persist image cache entry: {e}")
+
+
+def _finish_output(local_path: str, style: str, cache_key: str, upload_in_background: bool = False) -> str:
+    """Upload (now or in the background) and cache the result for identical inputs."""
+    if upload_in_background:
+        # Cache the local path first; the upload replaces it with the public URL
+        _store_cached_output(cache_key, os.path.abspath(local_path))
+        return _upload_in_background(local_path, style, cache_key)
+
+    url = _upload_or_fallback(local_path, style)
+    _store_cached_output(cache_key, url)
+    return url
+
 IMAGE_HOOK_LIMIT = 250  # Increased for complete sentences
 
+# Hook truncation boundaries, highest priority first; commas are a fallback
+_SENTENCE_BOUNDARIES = ('.', '!', '?', ':', ';', '—', '–')
+_BOUNDARY_RE = re.compile(r'([.!?:;—–,]) ')
+
+# Numbers worth featuring in AI images: percentages, dollar amounts, multipliers, "10+"
+_METRIC_RE = re.compile(r'\d+%|\$[\d,]+[KMB]?|\d+x|\d+\+')
+
 # ═══════════════════════════════════════════════════════════════════
 # STYLE-BASED IMAGE PROMPT LIBRARY (Updated Dec 2024)
 # Each style has a DISTINCT visual identity - not all handwritten
@@ -277,7 +458,159 @@ DO NOT use stock photos. Use illustrations or icons to tell the story."""
 DEFAULT_IMAGE_PROMPT = IMAGE_PROMPT_LIBRARY["storytelling"]
 
 
-async def generate_ai_image(hook_text: str, topic: str, style: str = "professional", full_content: str = None) -> str:
+def _compile_prompt(template: str) -> tuple[tuple[str, str | None], ...]:
+    """
+    Pre-parse a prompt template into (literal, field_name) chunks.
+
+    str.format() re-scans the whole ~2.5KB template on every call; joining
+    the pre-split chunks is several times faster. Only bare ``{name}``
+    fields are supported, which is all the prompt library uses.
+    """
+    chunks = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported prompt field: {{{field}!{conversion}:{format_spec}}}")
+        chunks.append((literal, field))
+    return tuple(chunks)
+
+
+def _render_prompt(chunks: tuple[tuple[str, str | None], ...], fields: dict[str, str]) -> str:
+    """Fill a compiled prompt template; equivalent to template.format(**fields)."""
+    return "".join([literal + fields[field] if field else literal for literal, field in chunks])
+
+
+# Templates with the quality rules already appended and pre-split, so each
+# prompt is a single join instead of format() plus a ~2KB concatenation
+_PREBAKED_PROMPTS = {k: _compile_prompt(v + IMAGE_QUALITY_RULES) for k, v in IMAGE_PROMPT_LIBRARY.items()}
+_DEFAULT_PREBAKED_PROMPT = _compile_prompt(DEFAULT_IMAGE_PROMPT + IMAGE_QUALITY_RULES)
+
+
+@functools.lru_cache(maxsize=16)
+def _style_key(style: str) -> str:
+    """Normalize a style name ("Thought Leadership" -> "thought_leadership")."""
+    return style.lower().replace(" ", "_")
+
+
+def _build_image_prompt(hook_text: str, topic: str, style: str, full_content: str = None) -> tuple[str, str]:
+    """
+    Build the Nano Banana prompt for a post.
+
+    Returns:
+        (style_key, prompt)
+    """
+    # Use full content if available, otherwise use topic + hook
+    content_to_analyze = full_content or f"{topic}\n\n{hook_text}"
+    
+    # Extract key elements for dynamic prompt (stop scanning after 5 metrics)
+    metrics = [m.group() for m in itertools.islice(_METRIC_RE.finditer(content_to_analyze), 5)]
+    metrics_text = ", ".join(metrics) if metrics else "key insights and data points"
+    
+    # Extract first sentence as main headline (cleaned up)
+    first_sentence, sep, remaining_content = content_to_analyze.partition('.')
+    first_sentence = first_sentence.replace('**', '').replace('\n', ' ').strip()
+    # Phase 1 Fix: Shorter headline (50 chars) + word boundary truncation
+    if len(first_sentence) > 50:
+        truncated = first_sentence[:50].rsplit(' ', 1)[0]
+        first_sentence = truncated + "..." if truncated else first_sentence[:50] + "..."
+    
+    # Remove first sentence from content to avoid duplication in image
+    remaining_content = remaining_content.strip() if sep else content_to_analyze
+    
+    # Get the appropriate prompt template based on style (quality rules included)
+    style_key = _style_key(style)
+    prompt_template = _PREBAKED_PROMPTS.get(style_key, _DEFAULT_PREBAKED_PROMPT)
+    
+    # Fill in the template with dynamic content (using remaining_content to avoid headline duplication)
+    prompt = _render_prompt(prompt_template, {
+        "content": remaining_content[:1500],
+        "headline": first_sentence,
+        "metrics": metrics_text,
+    })
+
+    return style_key, prompt
+
+
+_genai_client = None
+_genai_client_key: str | None = None
+_genai_client_lock = threading.Lock()
+
+# Cap on Nano Banana requests in flight per event loop. Image generation is
+# compute-bound on Google's side, so extra concurrency only adds queueing.
+NANO_BANANA_CONCURRENCY = int(os.environ.get("NANO_BANANA_CONCURRENCY", "3"))
+# How long generate_post_image waits for Nano Banana before using the
+# branded fallback
+NANO_BANANA_TIMEOUT_SECONDS = float(os.environ.get("NANO_BANANA_TIMEOUT_SECONDS", "60"))
+_nano_banana_semaphore: asyncio.Semaphore | None = None
+_nano_banana_semaphore_loop = None
+
+
+def _get_nano_banana_semaphore() -> asyncio.Semaphore:
+    """Get the Nano Banana semaphore for the running event loop.
+
+    asyncio primitives bind to one loop, so a new loop (e.g. a fresh
+    asyncio.run) gets a fresh semaphore. Only called from the loop thread.
+    """
+    global _nano_banana_semaphore, _nano_banana_semaphore_loop
+
+    loop = asyncio.get_running_loop()
+    if _nano_banana_semaphore is None or _nano_banana_semaphore_loop is not loop:
+        _nano_banana_semaphore = asyncio.Semaphore(NANO_BANANA_CONCURRENCY)
+        _nano_banana_semaphore_loop = loop
+    return _nano_banana_semaphore
+
+
+def _load_genai() -> None:
+    """Import the google-genai SDK into ``genai``/``types`` on first use."""
+    global genai, types
+    if genai is None:
+        from google import genai as genai_module
+        genai = genai_module
+    if types is None:
+        from google.genai import types as types_module
+        types = types_module
+
+
+def _get_genai_client():
+    """
+    Get the shared Gemini client for GOOGLE_API_KEY (thread-safe).
+
+    Building a client per call redoes auth and transport setup; the client
+    is rebuilt only if the API key changes.
+    """
+    global _genai_client, _genai_client_key
+
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+
+    with _genai_client_lock:
+        if _genai_client is None or _genai_client_key != api_key:
+            _load_genai()
+            _genai_client = genai.Client(api_key=api_key)
+            _genai_client_key = api_key
+
+    return _genai_client
+
+
+def _save_ai_image(part, style_key: str, cache_key: str, upload_in_background: bool = False) -> str:
+    """Write a Nano Banana image part to OUTPUT_DIR, upload it and cache the result."""
+    # inline_data already holds the encoded PNG; only very old SDKs hand back base64 text
+    image_data = part.inline_data.data
+    if isinstance(image_data, (bytes, bytearray)):
+        image_bytes = image_data
+    else:
+        import base64
+        image_bytes = base64.b64decode(image_data)
+
+    # Include style name in filename for easy identification
+    output_path = _new_output_path(f"ai_post_{style_key}")
+    filename = os.path.basename(output_path)
+    Path(output_path).write_bytes(image_bytes)
+    print(f"[OK] Nano Banana AI image generated: {filename}")
+    return _finish_output(output_path, style_key, cache_key, upload_in_background)
+
+async def generate_ai_image(hook_text: str, topic: str, style: str = "professional", full_content: str = None,
+                            upload_in_background: bool = False, use_cache: bool = True) -> str:
     """
     Generate an AI image using Gemini 2.5 Flash Image (Nano Banana).
     Uses style-based prompt library for specialized visuals.
@@ -287,6 +620,11 @@ async def generate_ai_image(hook_text: str, topic: str, style: str = "profession
         topic: The overall topic for context
         style: The writing style (storytelling, technical, thought_leadership, inspirational, professional)
         full_content: The complete post content for deeper analysis
+        upload_in_background: Return the local path right away and upload
+            on the I/O pool; await ``get_public_url`` for the final URL
+        use_cache: Reuse an earlier image for an identical prompt; pass
+            False to always generate a fresh one (it still replaces the
+            cached entry)
         
     Returns:
         Path to the saved image, or None if generation fails
@@ -296,84 +634,42 @@ async def generate_ai_image(hook_text: str, topic: str, style: str = "profession
         return None
         
     try:
-        # Initialize client with API key from environment
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
+        # Shared client for the API key from environment
+        client = _get_genai_client()
+        if client is None:
             print("GOOGLE_API_KEY not found for Nano Banana")
             return None
-            
-        client = genai.Client(api_key=api_key)
-        
-        # Use full content if available, otherwise use topic + hook
-        content_to_analyze = full_content or f"{topic}\n\n{hook_text}"
-        
-        # Extract key elements for dynamic prompt
-        metrics = re.findall(r'\d+%|\$[\d,]+[KMB]?|\d+x|\d+\+', content_to_analyze)
-        metrics_text = ", ".join(metrics[:5]) if metrics else "key insights and data points"
-        
-        # Extract first sentence as main headline (cleaned up)
-        sentences = content_to_analyze.split('.')
-        first_sentence = sentences[0].replace('**', '').replace('\n', ' ').strip()
-        # Phase 1 Fix: Shorter headline (50 chars) + word boundary truncation
-        if len(first_sentence) > 50:
-            truncated = first_sentence[:50].rsplit(' ', 1)[0]
-            first_sentence = truncated + "..." if truncated else first_sentence[:50] + "..."
-        
-        # Remove first sentence from content to avoid duplication in image
-        remaining_content = '.'.join(sentences[1:]).strip() if len(sentences) > 1 else content_to_analyze
         
-        # Get the appropriate prompt template based on style
-        style_key = style.lower().replace(" ", "_")
-        prompt_template = IMAGE_PROMPT_LIBRARY.get(style_key, DEFAULT_IMAGE_PROMPT)
-        
-        # Fill in the template with dynamic content (using remaining_content to avoid headline duplication)
-        prompt = prompt_template.format(
-            content=remaining_content[:1500],
-            headline=first_sentence,
-            metrics=metrics_text
-        )
-        
-        # Append quality rules to ensure spelling, margins, and text visibility
-        prompt += IMAGE_QUALITY_RULES
+        style_key, prompt = _build_image_prompt(hook_text, topic, style, full_content)
         
+        cache_key = _output_cache_key("ai", prompt)
+        cached = _get_cached_output(cache_key) if use_cache else None
+        if cached:
+            print(f"[IMAGE] Reusing cached {style_key} image for identical prompt")
+            return cached
+
         print(f"[IMAGE] Generating {style_key} style image with Nano Banana...")
 
-        # Generate image using Nano Banana
-        response = await client.aio.models.generate_content(
-            model="gemini-2.5-flash-image",
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                response_modalities=["IMAGE", "TEXT"]
+        # Generate image using Nano Banana (bounded across all callers)
+        async with _get_nano_banana_semaphore():
+            response = await client.aio.models.generate_content(
+                model="gemini-2.5-flash-image",
+                contents=[prompt],
+                config=types.GenerateContentConfig(
+                    response_modalities=["IMAGE", "TEXT"]
+                )
             )
-        )
         
         # Extract image from response
-        OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "outputs")
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         
+        loop = asyncio.get_running_loop()
         for part in response.candidates[0].content.parts:
             if hasattr(part, 'inline_data') and part.inline_data is not None:
-                # Use as_image() method to get PIL Image directly
-                try:
-                    image = part.as_image()
-                    # Include style name in filename for easy identification
-                    filename = f"ai_post_{style_key}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.png"
-                    output_path = os.path.join(OUTPUT_DIR, filename)
-                    image.save(output_path)
-                    print(f"[OK] Nano Banana AI image generated: {filename}")
-                    return _upload_or_fallback(output_path, style_key)
-                except AttributeError:
-                    # Fallback: try raw data approach
-                    image_data = part.inline_data.data
-                    if isinstance(image_data, str):
-                        # Base64 encoded string
-                        image_data = base64.b64decode(image_data)
-                    filename = f"ai_post_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.png"
-                    output_path = os.path.join(OUTPUT_DIR, filename)
-                    with open(output_path, 'wb') as f:
-                        f.write(image_data)
-                    print(f"[OK] Nano Banana AI image generated (raw): {filename}")
-                    return _upload_or_fallback(output_path, style_key)
+                # File write and upload are blocking - keep them off the event loop
+                return await loop.run_in_executor(
+                    _IO_POOL, _save_ai_image, part, style_key, cache_key, upload_in_background
+                )
         
         print("No image data in Nano Banana response")
         return None
@@ -384,162 +680,601 @@ async def generate_ai_image(hook_text: str, topic: str, style: str = "profession
         traceback.print_exc()
         return None
 
-def create_branded_image(text: str, author_name: str, subtitle: str = "SAP Program Leader | Founder at GNX") -> str:
-    """Create a branded LinkedIn image with CENTER-ALIGNED text and professional design"""
+async def generate_ai_images_batch(jobs: list[tuple[str, str, str, str]], concurrency: int = 4) -> list[str | None]:
+    """
+    Generate Nano Banana images for several posts concurrently.
+
+    Args:
+        jobs: (hook_text, topic, style, full_content) tuples, one per post
+        concurrency: Maximum Gemini requests in flight at once
+
+    Returns:
+        Image URL/path per job, in input order (None where generation failed)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(job: tuple[str, str, str, str]) -> str | None:
+        hook_text, topic, style, full_content = job
+        async with semaphore:
+            return await generate_ai_image(hook_text, topic, style, full_content)
+
+    return list(await asyncio.gather(*(_run(job) for job in jobs)))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# BRANDED IMAGE TEMPLATE
+# Background, accent bars, headshot and logo never change between posts,
+# so they are composited once into a read-only template. Each call only
+# renders the hook text and byline on small transparent overlays.
+# ═══════════════════════════════════════════════════════════════════
+
+BRANDED_W, BRANDED_H = 1200, 675
+BRANDED_BG_COLOR = (18, 29, 43)  # Dark navy
+BRANDED_ACCENT_COLOR = (0, 188, 212)  # Cyan accent
+# Optional (top, bottom) vertical gradient instead of the flat navy fill,
+# e.g. ((26, 26, 46), (22, 33, 62)) to match the "professional" AI style
+BRANDED_BG_GRADIENT: tuple[tuple[int, int, int], tuple[int, int, int]] | None = None
+
+# Layout constants
+BOTTOM_SECTION_HEIGHT = 120
+CONTENT_AREA_TOP = 60
+CONTENT_AREA_BOTTOM = BRANDED_H - BOTTOM_SECTION_HEIGHT - 40
+CONTENT_AREA_HEIGHT = CONTENT_AREA_BOTTOM - CONTENT_AREA_TOP
+CONTENT_PADDING_X = 60
+TEXT_OVERLAY_W = BRANDED_W - 2 * CONTENT_PADDING_X
+TEXT_MAX_WIDTH = BRANDED_W - 2 * 80  # Wrap width keeps 80px side margins
+LINE_SPACING = 65
+ACCENT_WIDTH = 80
+BOTTOM_SECTION_Y = BRANDED_H - 110
+PROFILE_X = 60
+PROFILE_SIZE = 75
+LOGO_SIZE = 95
+BYLINE_HEIGHT = 75
+BRANDED_SUBTITLE = "SAP Program Leader | Founder at GNX"
+PNG_COMPRESS_LEVEL = 1
+
+_TEMPLATE: Image.Image | None = None
+_TEMPLATE_HAS_PROFILE = False
+_template_lock = threading.Lock()
+
+
+def _build_circle_mask(size: int, supersample: int = 4) -> Image.Image:
+    """Antialiased circular 'L' mask, drawn large and downsampled."""
+    big = Image.new('L', (size * supersample, size * supersample), 0)
+    ImageDraw.Draw(big).ellipse((0, 0, size * supersample, size * supersample), fill=255)
+    return big.resize((size, size), Image.LANCZOS)
+
+
+# Masks are never mutated by paste(), so one instance is shared by all renders
+_PROFILE_CIRCLE_MASK = _build_circle_mask(PROFILE_SIZE)
+
+
+def _load_profile_headshot() -> Image.Image | None:
+    """Headshot resized and cut to a circle as RGBA, or None if unavailable."""
+    try:
+        profile_pic_path = os.path.join(ASSETS_DIR, "headshot_Kunal.JPG")
+        if not os.path.exists(profile_pic_path):
+            return None
+        with Image.open(profile_pic_path) as pic:
+            # Let libjpeg DCT-scale the 2048px headshot during decode
+            pic.draft('RGB', (PROFILE_SIZE, PROFILE_SIZE))
+            headshot = pic.convert('RGB').resize((PROFILE_SIZE, PROFILE_SIZE), Image.LANCZOS).convert('RGBA')
+        headshot.putalpha(_PROFILE_CIRCLE_MASK)
+        return headshot
+    except Exception:
+        return None
+
+
+def _build_background(W: int, H: int) -> Image.Image:
+    """Flat navy fill, or BRANDED_BG_GRADIENT blended top-to-bottom."""
+    if BRANDED_BG_GRADIENT is None:
+        return Image.new('RGB', (W, H), color=BRANDED_BG_COLOR)
+
+    # linear_gradient/composite run in C - no per-pixel Python loop
+    top, bottom = BRANDED_BG_GRADIENT
+    mask = Image.linear_gradient('L').resize((W, H))
+    return Image.composite(Image.new('RGB', (W, H), bottom), Image.new('RGB', (W, H), top), mask)
+
+
+def _build_template() -> tuple[Image.Image, bool]:
+    """Composite the static parts of the branded image (never mutated afterwards)."""
+    W, H = BRANDED_W, BRANDED_H
+    img = _build_background(W, H)
+    draw = ImageDraw.Draw(img)
+
+    # === ACCENT LINES (top and bottom decorative elements) ===
+    for accent_y in (40, CONTENT_AREA_BOTTOM + 10):
+        draw.rectangle(
+            [(W//2 - ACCENT_WIDTH//2, accent_y), (W//2 + ACCENT_WIDTH//2, accent_y + 4)],
+            fill=BRANDED_ACCENT_COLOR
+        )
+
+    # Profile picture
+    profile_img = _load_profile_headshot()
+    profile_added = profile_img is not None
+    if profile_added:
+        img.paste(profile_img, (PROFILE_X, BOTTOM_SECTION_Y), profile_img)
+
+    # GNX Logo (BOTTOM-RIGHT)
     try:
-        W, H = 1200, 675
-        bg_color = (18, 29, 43)  # Dark navy
-        accent_color = (0, 188, 212)  # Cyan accent
-        img = Image.new('RGB', (W, H), color=bg_color)
-        draw = ImageDraw.Draw(img)
-        
-        # Get assets directory
-        ASSETS_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "assets")
-        OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "outputs")
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        
-        # Try to load fonts
-        try:
-            font_bold_path = os.path.join(ASSETS_DIR, "Poppins-Bold.ttf")
-            font_regular_path = os.path.join(ASSETS_DIR, "Poppins-Regular.ttf")
-            
-            # Font sizes
-            font = ImageFont.truetype(font_bold_path, 48)  # Main text - BOLD for impact
-            font_author = ImageFont.truetype(font_bold_path, 26)  # Author name
-            font_subtitle = ImageFont.truetype(font_regular_path, 18)  # Subtitle
-        except:
-            font = ImageFont.load_default()
-            font_author = ImageFont.load_default()
-            font_subtitle = ImageFont.load_default()
-
-        # Extract and clean hook text
-        hook_text = text.split('\n')[0].replace('**', '')
-        # Remove emojis completely (not demojize which leaves text like 'fire')
+        logo_path = os.path.join(ASSETS_DIR, "GNX_Automation_Logo-removebg-preview.png")
+        if os.path.exists(logo_path):
+            logo_img = Image.open(logo_path).convert('RGBA').resize((LOGO_SIZE, LOGO_SIZE), Image.LANCZOS)
+            logo_x = W - LOGO_SIZE - 60
+            logo_y = BOTTOM_SECTION_Y - 10
+            # Blend with alpha_composite on just the logo's box rather than
+            # a masked paste; the rest of the template stays plain RGB
+            box = (logo_x, logo_y, logo_x + LOGO_SIZE, logo_y + LOGO_SIZE)
+            region = img.crop(box).convert('RGBA')
+            region.alpha_composite(logo_img)
+            img.paste(region.convert('RGB'), box[:2])
+    except Exception:
+        pass
+
+    return img, profile_added
+
+
+def _get_template() -> tuple[Image.Image, bool]:
+    """Get the shared branded template, building it on first use (thread-safe).
+
+    Callers must ``copy()`` the returned image before drawing on it.
+    """
+    global _TEMPLATE, _TEMPLATE_HAS_PROFILE
+
+    # Fast path: once built, the template is only ever read
+    if _TEMPLATE is None:
+        with _template_lock:
+            if _TEMPLATE is None:
+                template, has_profile = _build_template()
+                # Publish the flag before the image so lock-free readers never see a stale flag
+                _TEMPLATE_HAS_PROFILE = has_profile
+                _TEMPLATE = template
+
+    return _TEMPLATE, _TEMPLATE_HAS_PROFILE
+
+
+class FontLoadError(RuntimeError):
+    """Raised when the bundled Poppins fonts cannot be loaded."""
+
+
+_FONTS: tuple | None = None
+_FONT_LOAD_FAILED = False
+_HOOK_GLYPH_ADVANCES: dict[str, float] = {}
+_font_lock = threading.Lock()
+
+
+def _get_fonts() -> tuple:
+    """
+    Load the branded fonts once and cache them for every later call.
+
+    The wrap width and LINE_SPACING are tuned for 48px Poppins, so falling
+    back to PIL's default bitmap font would produce a broken layout. A failed
+    load is remembered so later calls fail fast without touching the disk.
+
+    Returns:
+        (hook_font, author_font, subtitle_font)
+
+    Raises:
+        FontLoadError: If the font files are missing or unreadable
+    """
+    global _FONTS, _FONT_LOAD_FAILED
+
+    # Fast path: fonts are immutable once loaded
+    if _FONTS is None:
+        with _font_lock:
+            if _FONTS is None:
+                if _FONT_LOAD_FAILED:
+                    raise FontLoadError("Branded fonts unavailable (cached failure)")
+                font_bold_path = os.path.join(ASSETS_DIR, "Poppins-Bold.ttf")
+                font_regular_path = os.path.join(ASSETS_DIR, "Poppins-Regular.ttf")
+                try:
+                    fonts = (
+                        ImageFont.truetype(font_bold_path, 48),  # Main text - BOLD for impact
+                        ImageFont.truetype(font_bold_path, 26),  # Author name
+                        ImageFont.truetype(font_regular_path, 18),  # Subtitle
+                    )
+                except OSError as e:
+                    _FONT_LOAD_FAILED = True
+                    print(f"[IMAGE] Could not load branded fonts from {ASSETS_DIR}: {e}")
+                    raise FontLoadError(str(e)) from e
+                # Advance widths for the hook wrapper; other glyphs are added on first use
+                _HOOK_GLYPH_ADVANCES.clear()
+                _HOOK_GLYPH_ADVANCES.update({ch: fonts[0].getlength(ch) for ch in string.printable})
+                _FONTS = fonts
+
+    return _FONTS
+
+
+def warm_branded_assets() -> bool:
+    """
+    Load the branded fonts and build the template ahead of the first request.
+
+    Call from app startup so the first post doesn't pay for font parsing and
+    asset decoding. Safe to call more than once.
+
+    Returns:
+        True if the branded renderer is ready, False if the fonts are missing
+    """
+    try:
+        _get_fonts()
+    except FontLoadError:
+        return False
+    _get_template()
+    return True
+
+
+def _truncate_hook(hook_text: str) -> str:
+    """Cut a hook to IMAGE_HOOK_LIMIT at the best sentence/clause/word boundary."""
+    truncated = hook_text[:IMAGE_HOOK_LIMIT]
+
+    # One pass records the last position of every boundary type
+    last_boundary = {}
+    for match in _BOUNDARY_RE.finditer(truncated):
+        last_boundary[match.group(1)] = match.start()
+
+    # Try to find sentence-ending punctuation (in priority order)
+    for punct in _SENTENCE_BOUNDARIES:
+        last_punct = last_boundary.get(punct, -1)
+        if last_punct > IMAGE_HOOK_LIMIT // 3:  # Allow finding earlier boundaries
+            return truncated[:last_punct + 1].strip()
+
+    # If no sentence boundary, try finding comma for clause boundary
+    if last_boundary.get(',', -1) > IMAGE_HOOK_LIMIT // 2:
+        return truncated[:last_boundary[',']].strip() + "..."
+
+    # Last resort: truncate at last word and add ellipsis
+    last_space = truncated.rfind(' ')
+    if last_space > 0:
+        return truncated[:last_space].strip() + "..."
+    return truncated.strip() + "..."
+
+
+def _clean_hook_text(text: str) -> str:
+    """Reduce post content to a capitalized, emoji-free hook that fits the image."""
+    # Extract and clean hook text
+    hook_text = text.split('\n')[0].replace('**', '')
+    # Remove emojis completely (not demojize which leaves text like 'fire').
+    # Every emoji has a non-ASCII code point, so plain ASCII hooks skip the scan.
+    if not hook_text.isascii():
+        import emoji
         hook_text = emoji.replace_emoji(hook_text, replace='')
-        hook_text = hook_text.strip()
-        
-        # Ensure first letter is capitalized
-        if hook_text:
-            hook_text = hook_text[0].upper() + hook_text[1:] if len(hook_text) > 1 else hook_text.upper()
-        
-        # Smart truncation at sentence/clause boundaries
-        if len(hook_text) > IMAGE_HOOK_LIMIT:
-            truncated = hook_text[:IMAGE_HOOK_LIMIT]
-            found_boundary = False
-            
-            # Try to find sentence-ending punctuation
-            for punct in ['. ', '! ', '? ', ': ', '; ', '— ', '– ']:
-                last_punct = truncated.rfind(punct)
-                if last_punct > IMAGE_HOOK_LIMIT // 3:  # Allow finding earlier boundaries
-                    hook_text = truncated[:last_punct + 1].strip()
-                    found_boundary = True
+    hook_text = hook_text.strip()
+    
+    # Ensure first letter is capitalized
+    if hook_text:
+        hook_text = hook_text[0].upper() + hook_text[1:] if len(hook_text) > 1 else hook_text.upper()
+    
+    # Smart truncation at sentence/clause boundaries
+    if len(hook_text) > IMAGE_HOOK_LIMIT:
+        hook_text = _truncate_hook(hook_text)
+
+    return hook_text
+
+
+def _text_width(text: str, font: ImageFont.FreeTypeFont) -> float:
+    """Approximate rendered width of text from cached glyph advances."""
+    advances = _HOOK_GLYPH_ADVANCES
+    width = 0.0
+    for ch in text:
+        advance = advances.get(ch)
+        if advance is None:
+            # Misses are rare (non-printable glyphs); the lock keeps them
+            # from racing the table rebuild in _get_fonts
+            with _font_lock:
+                advance = advances[ch] = font.getlength(ch)
+        width += advance
+    return width
+
+
+def _wrap_pixels(text: str, font: ImageFont.FreeTypeFont, max_px: float) -> list[str]:
+    """
+    Greedy word wrap by rendered width rather than character count.
+
+    Words wider than a whole line are broken at the last character that fits.
+    """
+    space_w = _text_width(' ', font)
+    lines = []
+    current = []
+    current_w = 0.0
+
+    for word in text.split():
+        word_w = _text_width(word, font)
+
+        # Hard-break words that can't fit on any line
+        while word_w > max_px:
+            if current:
+                lines.append(' '.join(current))
+                current, current_w = [], 0.0
+            cut, cut_w = 0, 0.0
+            for ch in word:
+                ch_w = _text_width(ch, font)
+                if cut and cut_w + ch_w > max_px:
                     break
-            
-            # If no sentence boundary, try finding comma for clause boundary
-            if not found_boundary:
-                last_comma = truncated.rfind(', ')
-                if last_comma > IMAGE_HOOK_LIMIT // 2:
-                    hook_text = truncated[:last_comma].strip() + "..."
-                    found_boundary = True
-            
-            # Last resort: truncate at last word and add ellipsis
-            if not found_boundary:
-                last_space = truncated.rfind(' ')
-                if last_space > 0:
-                    hook_text = truncated[:last_space].strip() + "..."
-                else:
-                    hook_text = truncated.strip() + "..."
-        
-        # Layout constants
-        BOTTOM_SECTION_HEIGHT = 120
-        CONTENT_AREA_TOP = 60
-        CONTENT_AREA_BOTTOM = H - BOTTOM_SECTION_HEIGHT - 40
-        CONTENT_AREA_HEIGHT = CONTENT_AREA_BOTTOM - CONTENT_AREA_TOP
-        
-        # === DRAW ACCENT LINE (top decorative element) ===
-        accent_y = 40
-        accent_width = 80
-        draw.rectangle([(W//2 - accent_width//2, accent_y), (W//2 + accent_width//2, accent_y + 4)], fill=accent_color)
-        
-        # Wrap text into lines
-        lines = textwrap.wrap(hook_text, width=32)[:4]  # Fewer chars per line for centered look
-        num_lines = len(lines)
-        LINE_SPACING = 65
-        total_text_height = num_lines * LINE_SPACING
-        
-        # Center text vertically in content area
-        start_y = CONTENT_AREA_TOP + (CONTENT_AREA_HEIGHT - total_text_height) // 2
-        
-        # === DRAW CENTERED TEXT ===
-        current_h = start_y
-        for line in lines:
-            # Calculate center position for each line
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
-            x_centered = (W - text_width) // 2
-            
-            draw.text((x_centered, current_h), line, font=font, fill='white')
-            current_h += LINE_SPACING
-        
-        # === DRAW BOTTOM ACCENT LINE ===
-        bottom_accent_y = CONTENT_AREA_BOTTOM + 10
-        draw.rectangle([(W//2 - accent_width//2, bottom_accent_y), (W//2 + accent_width//2, bottom_accent_y + 4)], fill=accent_color)
-        
-        # === BOTTOM SECTION (Author + Logo) ===
-        bottom_section_y = H - 110
-        
-        # Profile picture
-        profile_x = 60
-        profile_y = bottom_section_y
-        profile_added = False
-        
+                cut += 1
+                cut_w += ch_w
+            lines.append(word[:cut])
+            word = word[cut:]
+            word_w = _text_width(word, font)
+        if not word:
+            continue
+
+        if current and current_w + space_w + word_w > max_px:
+            lines.append(' '.join(current))
+            current, current_w = [], 0.0
+
+        current_w = word_w if not current else current_w + space_w + word_w
+        current.append(word)
+
+    if current:
+        lines.append(' '.join(current))
+    return lines
+
+
+@functools.lru_cache(maxsize=256)
+def _layout_hook(hook_text: str) -> tuple[tuple[str, int], ...]:
+    """
+    Wrap a hook into lines and center each one horizontally.
+
+    Memoized because retries and re-renders reuse the same hook, and
+    measuring each line is a FreeType layout pass.
+
+    Returns:
+        (line, x_offset) pairs relative to the text overlay
+    """
+    font = _get_fonts()[0]
+    layout = []
+    for line in _wrap_pixels(hook_text, font, TEXT_MAX_WIDTH)[:4]:
+        bbox = font.getbbox(line)
+        layout.append((line, (TEXT_OVERLAY_W - (bbox[2] - bbox[0])) // 2))
+    return tuple(layout)
+
+
+@functools.lru_cache(maxsize=32)
+def _byline_strip(author_name: str, subtitle: str, width: int) -> Image.Image:
+    """
+    Author name and subtitle on a transparent strip (shared, never mutated).
+
+    The byline is effectively constant per user, so it is rendered once and
+    pasted on every image.
+
+    Raises:
+        FontLoadError: If the branded fonts are unavailable
+    """
+    _, font_author, font_subtitle = _get_fonts()
+    byline = Image.new('RGBA', (width, BYLINE_HEIGHT), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(byline)
+    draw.text((0, 12), author_name, font=font_author, fill='white')
+    draw.text((0, 42), subtitle, font=font_subtitle, fill=(150, 150, 150))
+    return byline
+
+
+def _render_branded_image(text: str, author_name: str, subtitle: str) -> Image.Image:
+    """
+    Render a branded post image in memory.
+
+    Raises:
+        FontLoadError: If the branded fonts are unavailable
+    """
+    W = BRANDED_W
+    font = _get_fonts()[0]
+    template, profile_added = _get_template()
+
+    layout = _layout_hook(_clean_hook_text(text))
+    total_text_height = len(layout) * LINE_SPACING
+
+    # Center text vertically in content area
+    start_y = CONTENT_AREA_TOP + (CONTENT_AREA_HEIGHT - total_text_height) // 2
+
+    # === DRAW CENTERED TEXT (on a transparent overlay sized to the text block) ===
+    overlay = Image.new('RGBA', (TEXT_OVERLAY_W, total_text_height + LINE_SPACING), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    current_h = 0
+    for line, x_centered in layout:
+        draw.text((x_centered, current_h), line, font=font, fill='white')
+        current_h += LINE_SPACING
+
+    # === BOTTOM SECTION (Author) ===
+    author_x = PROFILE_X + 95 if profile_added else PROFILE_X
+    byline = _byline_strip(author_name, subtitle, W - author_x)
+
+    # Composite overlays onto a private copy of the read-only template
+    img = template.copy()
+    img.paste(overlay, (CONTENT_PADDING_X, start_y), overlay)
+    img.paste(byline, (author_x, BOTTOM_SECTION_Y), byline)
+    return img
+
+
+def _save_branded_image(img: Image.Image, cache_key: str, upload_in_background: bool = False) -> str:
+    """Encode a rendered branded image, upload it and cache the result.
+
+    Blocking uploads send the encoded bytes straight to Supabase; the PNG
+    only touches OUTPUT_DIR for background uploads or when the upload fails.
+    """
+    # Flat navy background compresses well even at level 1, and these
+    # images are uploaded once, so encode speed beats file size
+    buf = io.BytesIO()
+    img.save(buf, format='PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    data = buf.getvalue()
+
+    if SUPABASE_STORAGE_AVAILABLE and not upload_in_background:
         try:
-            profile_pic_path = os.path.join(ASSETS_DIR, "headshot_Kunal.JPG")
-            if os.path.exists(profile_pic_path):
-                profile_size = 75
-                profile_img = Image.open(profile_pic_path).resize((profile_size, profile_size))
-                
-                # Circular mask
-                mask = Image.new('L', (profile_size, profile_size), 0)
-                draw_mask = ImageDraw.Draw(mask)
-                draw_mask.ellipse((0, 0, profile_size, profile_size), fill=255)
-                
-                img.paste(profile_img, (profile_x, profile_y), mask)
-                profile_added = True
-        except:
-            pass
-
-        # Author info
-        author_x = profile_x + 95 if profile_added else profile_x
-        author_y_name = profile_y + 12
-        author_y_subtitle = profile_y + 42
-        
-        draw.text((author_x, author_y_name), author_name, font=font_author, fill='white')
-        draw.text((author_x, author_y_subtitle), subtitle, font=font_subtitle, fill=(150, 150, 150))
+            public_url = upload_image_bytes_to_supabase(data, "branded", ".png")
+        except Exception as e:
+            print(f"[WARN] Supabase upload failed, using local path: {e}")
+            public_url = None
+        if public_url:
+            _store_cached_output(cache_key, public_url)
+            return public_url
+
+    output_path = _new_output_path("post")
+    with open(output_path, 'wb') as f:
+        f.write(data)
+
+    if upload_in_background:
+        return _finish_output(output_path, "branded", cache_key, upload_in_background=True)
+
+    local_path = os.path.abspath(output_path)
+    _store_cached_output(cache_key, local_path)
+    return local_path
 
-        # GNX Logo (BOTTOM-RIGHT)
+
+def create_branded_image(text: str, author_name: str, subtitle: str = BRANDED_SUBTITLE,
+                         upload_in_background: bool = False, use_cache: bool = True) -> str:
+    """Create a branded LinkedIn image with CENTER-ALIGNED text and professional design
+
+    Pass ``upload_in_background=True`` to get the local path back before the
+    Supabase upload finishes; ``get_public_url`` resolves the final URL.
+    Pass ``use_cache=False`` to render a fresh image even if identical
+    inputs were rendered before.
+    """
+    try:
+        # Create output directory if it doesn't exist
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+        cache_key = _output_cache_key("branded", text, author_name, subtitle)
+        cached = _get_cached_output(cache_key) if use_cache else None
+        if cached:
+            return cached
+
+        # Layout constants are tuned for Poppins; bail out if it's missing
         try:
-            logo_path = os.path.join(ASSETS_DIR, "GNX_Automation_Logo-removebg-preview.png")
-            if os.path.exists(logo_path):
-                logo_size = 95
-                logo_img = Image.open(logo_path).resize((logo_size, logo_size))
-                logo_x = W - logo_size - 60
-                logo_y = bottom_section_y - 10
-                img.paste(logo_img, (logo_x, logo_y), logo_img)
-        except:
-            pass
-
-        # Save
-        filename = f"post_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.png"
-        output_path = os.path.join(OUTPUT_DIR, filename)
-        img.save(output_path, format='PNG')
-        
-        return _upload_or_fallback(output_path, "branded")
+            img = _render_branded_image(text, author_name, subtitle)
+        except FontLoadError:
+            return None
+
+        return _save_branded_image(img, cache_key, upload_in_background)
 
     except Exception as e:
         print(f"Image generation error: {e}")
         import traceback
         traceback.print_exc()
-        return None
\ No newline at end of file
+        return None
+
+
+async def create_branded_image_async(text: str, author_name: str, subtitle: str = BRANDED_SUBTITLE,
+                                    upload_in_background: bool = False, use_cache: bool = True) -> str:
+    """
+    Awaitable ``create_branded_image`` for async request handlers.
+
+    Font loading, rendering, PNG encoding and the upload all block, so they
+    run on the shared I/O pool instead of stalling the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _IO_POOL,
+        functools.partial(create_branded_image, text, author_name, subtitle, upload_in_background, use_cache)
+    )
+
+
+async def generate_post_image(content: str, hook_text: str, topic: str, author_name: str,
+                              style: str = "professional", subtitle: str = BRANDED_SUBTITLE,
+                              ai_timeout: float | None = NANO_BANANA_TIMEOUT_SECONDS,
+                              use_cache: bool = True) -> str | None:
+    """
+    Generate a Nano Banana image, falling back to a branded image.
+
+    The branded image is rendered in memory on the I/O pool while Gemini
+    runs, so a failed or timed-out AI call costs max(t_ai, t_branded)
+    instead of their sum. The branded render is only saved/uploaded when
+    it's actually used.
+
+    Args:
+        content: Full post content (AI prompt context and branded hook source)
+        hook_text: Headline for the AI image
+        topic: The overall topic for context
+        author_name: Byline for the branded fallback
+        style: The writing style for the AI prompt
+        subtitle: Byline subtitle for the branded fallback
+        ai_timeout: Seconds to wait for Gemini before using the fallback
+            (None waits indefinitely)
+        use_cache: Reuse earlier images for identical inputs
+
+    Returns:
+        Image URL/path, or None if both generators fail
+    """
+    loop = asyncio.get_running_loop()
+    fallback = loop.run_in_executor(_IO_POOL, _render_branded_image, content, author_name, subtitle)
+    # The render is abandoned when the AI image or a cached one wins, or the
+    # caller is cancelled; retrieve any error it raised so asyncio doesn't
+    # log it as never retrieved
+    fallback.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    try:
+        image_path = await asyncio.wait_for(
+            generate_ai_image(hook_text=hook_text, topic=topic, style=style, full_content=content,
+                              use_cache=use_cache),
+            ai_timeout
+        )
+    except asyncio.TimeoutError:
+        print(f"[IMAGE] Nano Banana timed out after {ai_timeout}s - using branded fallback")
+        image_path = None
+
+    if image_path:
+        fallback.cancel()  # Result unused; a no-op if the render already finished
+        return image_path
+
+    print("Falling back to static branded image")
+    cache_key = _output_cache_key("branded", content, author_name, subtitle)
+    cached = _get_cached_output(cache_key) if use_cache else None
+    if cached:
+        fallback.cancel()
+        return cached
+    try:
+        img = await fallback
+        return await loop.run_in_executor(_IO_POOL, _save_branded_image, img, cache_key)
+    except FontLoadError:
+        return None
+    except Exception as e:
+        print(f"Image generation error: {e}")
+        return None
+
+
+def create_branded_images_batch(items: list[tuple[str, str, str]]) -> list[str | None]:
+    """
+    Create branded images for several posts in one pass.
+
+    Fonts and the template are loaded once for the whole batch. Rendering
+    stays on the calling thread while PNG encoding and uploads for earlier
+    posts run on the shared I/O pool.
+
+    Args:
+        items: (text, author_name, subtitle) tuples, one per post
+
+    Returns:
+        Image URL/path per item, in input order (None where that item failed)
+    """
+    try:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        _get_fonts()
+        _get_template()
+    except FontLoadError:
+        return [None] * len(items)
+
+    futures = []
+    for text, author_name, subtitle in items:
+        cache_key = _output_cache_key("branded", text, author_name, subtitle)
+        cached = _get_cached_output(cache_key)
+        if cached:
+            futures.append(cached)
+            continue
+        try:
+            img = _render_branded_image(text, author_name, subtitle)
+            futures.append(_IO_POOL.submit(_save_branded_image, img, cache_key))
+        except Exception as e:
+            print(f"Image generation error: {e}")
+            futures.append(None)
+
+    concurrent.futures.wait([f for f in futures if isinstance(f, concurrent.futures.Future)])
+
+    results = []
+    for future in futures:
+        if not isinstance(future, concurrent.futures.Future):
+            # Cache hit (URL/path) or failed render (None)
+            results.append(future)
+            continue
+        try:
+            results.append(future.result())
+        except Exception as e:
+            print(f"Image save error: {e}")
+            results.append(None)
+    return results
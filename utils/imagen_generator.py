@@ -6,10 +6,17 @@ Uses Google Vertex AI to generate professional business infographics
 """
 
 import os
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
 import logging
+import re
+import tempfile
+import threading
+import time
 import uuid
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List
 
 try:
     from google.cloud import aiplatform
@@ -20,11 +27,105 @@ except ImportError:
     VERTEX_AI_AVAILABLE = False
     logging.warning("Vertex AI libraries not installed. Image generation will use fallback.")
 
+try:
+    from google.cloud.storage import transfer_manager
+except ImportError:
+    # google-cloud-storage < 2.10: every image goes up in a single request
+    transfer_manager = None
+
 from config import config
 from utils.logger import log_error, log_agent_action
+from utils.cache import cache_get, cache_set
 
 logger = logging.getLogger(__name__)
 
+# Uploads under this size go out as one multipart request; larger images are
+# split into chunks uploaded in parallel (XML multipart upload)
+SINGLE_REQUEST_UPLOAD_LIMIT = 8 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+UPLOAD_MAX_WORKERS = 8
+
+# Default cap on concurrent Imagen generations in a batch
+IMAGEN_CONCURRENCY = int(os.getenv("IMAGEN_CONCURRENCY", "5"))
+
+# Most images one generate_images call may return (Vertex API limit)
+MAX_IMAGE_VARIANTS = 4
+
+# Anything outside [0-9A-Za-z] becomes "_" in object names
+_UNSAFE_NAME_CHARS_RE = re.compile(r'[^0-9A-Za-z]')
+
+# Static infographic instructions; only the headline, topic and brand colors vary
+BUSINESS_INFOGRAPHIC_PROMPT = """Create a professional LinkedIn business infographic image. This MUST be a BUSINESS GRAPHIC, NOT a photograph.
+
+CRITICAL: This is a BUSINESS INFOGRAPHIC for LinkedIn, NOT a photorealistic scene, landscape, or photo.
+
+CONTENT:
+- Main headline text: "{text_content}"
+- Topic: {topic}
+- Display the headline prominently and clearly
+
+VISUAL STYLE:
+- Professional business presentation style (like PowerPoint or Keynote slides)
+- Clean, modern corporate design
+- Suitable for LinkedIn professional audience
+- Similar to business dashboards or infographics
+- NOT a photograph, NOT a scenic image, NOT realistic imagery
+
+LAYOUT TYPE - Choose ONE:
+1. Text-focused: Large headline on solid colored background with minimal graphics
+2. Diagram: Flow chart or process diagram with boxes and arrows  
+3. Data visualization: Chart or graph showing statistics
+4. Split layout: Text on one side, simple icon/graphic on other
+
+DESIGN SPECIFICATIONS:
+- Aspect ratio: 16:9 (landscape, 1200x675 pixels)
+- Background: Solid color gradient (navy blue to dark blue) OR light gray
+- Typography: Large, bold, professional sans-serif font
+- Text color: High contrast (white on dark, or dark on light)
+- Graphics: Simple icons, shapes, or diagrams (NOT photos)
+- Professional business aesthetic
+
+COLOR SCHEME:
+- Primary: {primary} (navy/dark blue)
+- Secondary: {secondary} (white)
+- Accent: {accent} (light blue for highlights)
+- Use corporate/professional color palette
+
+TEXT RENDERING:
+- Make headline text LARGE and READABLE
+- Use professional typography
+- High contrast for readability
+- Center or left-align based on layout
+
+STYLE KEYWORDS:
+- Corporate presentation
+- Business infographic
+- Professional slide design
+- LinkedIn post graphic
+- Clean and minimal
+- Data visualization style
+
+AVOID:
+- Photorealistic images
+- Landscapes or scenic photos
+- People or faces
+- Stock photography look
+- Cluttered designs
+- Too much text (keep it concise)
+
+EXAMPLES OF CORRECT STYLE:
+- PowerPoint title slide with large text
+- Business dashboard screenshot
+- Flow diagram with boxes and arrows
+- Data chart or graph
+- Professional quote card
+- Corporate announcement graphic
+
+Generate a clean, professional business infographic suitable for a LinkedIn post."""
+
+# Identical prompts reuse the uploaded image instead of paying for a new one
+IMAGE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
 
 class ImagenGenerator:
     """Generate professional LinkedIn images using Gemini 3 Pro Image (Nano Banana Pro)"""
@@ -34,7 +135,6 @@ class ImagenGenerator:
         self.enabled = VERTEX_AI_AVAILABLE
         self.model = None
         self.storage_client = None
-        self.bucket = None
         
         if self.enabled:
             try:
@@ -50,21 +150,9 @@ class ImagenGenerator:
                 
                 logger.info("[OK] Gemini 3 Pro Image (Nano Banana Pro) loaded successfully")
                 
-                # Initialize Cloud Storage
+                # Initialize Cloud Storage (the bucket is looked up before the first generation)
                 self.storage_client = storage.Client(project=config.project_id)
                 
-                # Get or create bucket
-                try:
-                    self.bucket = self.storage_client.get_bucket(config.GCS_BUCKET_NAME)
-                    logger.info(f"[OK] Using existing GCS bucket: {config.GCS_BUCKET_NAME}")
-                except Exception:
-                    # Bucket doesn't exist, create it
-                    self.bucket = self.storage_client.create_bucket(
-                        config.GCS_BUCKET_NAME,
-                        location=config.GCP_REGION
-                    )
-                    logger.info(f"[OK] Created GCS bucket: {config.GCS_BUCKET_NAME}")
-                
                 logger.info("[OK] Gemini 3 Pro Image (Nano Banana Pro) initialized successfully")
                 
             except Exception as e:
@@ -72,6 +160,21 @@ class ImagenGenerator:
                 self.enabled = False
                 logger.warning("[WARN] Falling back to PIL-based image generation")
     
+    @functools.cached_property
+    def bucket(self):
+        """GCS bucket for uploads, fetched (or created) on first use"""
+        try:
+            bucket = self.storage_client.get_bucket(config.GCS_BUCKET_NAME)
+            logger.info(f"[OK] Using existing GCS bucket: {config.GCS_BUCKET_NAME}")
+        except Exception:
+            # Bucket doesn't exist, create it
+            bucket = self.storage_client.create_bucket(
+                config.GCS_BUCKET_NAME,
+                location=config.GCP_REGION
+            )
+            logger.info(f"[OK] Created GCS bucket: {config.GCS_BUCKET_NAME}")
+        return bucket
+    
     def generate_linkedin_image(
         self, 
         topic: str, 
@@ -101,25 +204,21 @@ class ImagenGenerator:
             # Build the prompt for business infographic
             prompt = self._build_business_infographic_prompt(topic, headline, style, include_stats, brand_colors)
             
-            log_agent_action("ImagenGenerator", "Generating LinkedIn business infographic", f"Topic: {topic}")
+            cache_key = self._cache_key(prompt)
+            cached_url = cache_get(cache_key)
+            if cached_url:
+                log_agent_action("ImagenGenerator", "Reusing cached business infographic", f"URL: {cached_url}")
+                return cached_url
             
-            # Generate image with Gemini 3 Pro Image
-            response = self.model.generate_images(
-                prompt=prompt,
-                number_of_images=1,
-                aspect_ratio="16:9",  # LinkedIn optimal ratio (1200x675)
-                safety_filter_level="block_some"
-            )
+            log_agent_action("ImagenGenerator", "Generating LinkedIn business infographic", f"Topic: {topic}")
             
-            # Get the generated image
-            if not response.images:
-                logger.error("No images generated")
+            urls = self._generate_and_upload(prompt, topic, 1)
+            if not urls:
                 return None
             
-            image = response.images[0]
-            
-            # Upload to GCS
-            public_url = self._upload_to_gcs(image, topic)
+            public_url = urls[0]
+            if public_url:
+                cache_set(cache_key, public_url, ttl=IMAGE_CACHE_TTL_SECONDS)
             
             log_agent_action("ImagenGenerator", "[OK] Business infographic generated successfully", f"URL: {public_url}")
             
@@ -129,6 +228,119 @@ class ImagenGenerator:
             log_error(e, "Imagen image generation")
             return None
     
+    def generate_linkedin_image_variants(
+        self,
+        topic: str,
+        headline: str = None,
+        variants: int = 2,
+        style: str = "professional",
+        include_stats: bool = False,
+        brand_colors: Dict[str, str] = None
+    ) -> List[str]:
+        """
+        Generate several alternative infographics for one post in a single model call
+        
+        Args:
+            topic: The post topic
+            headline: Main headline text to display (optional)
+            variants: Number of images, capped at MAX_IMAGE_VARIANTS
+            style: Image style (professional, modern, minimalist, bold)
+            include_stats: Whether to include statistical visualization
+            brand_colors: Dict with 'primary', 'secondary', 'accent' colors
+            
+        Returns:
+            Public URLs of the uploaded images (empty if generation failed)
+        """
+        if not self.enabled:
+            logger.warning("Imagen not available, skipping image generation")
+            return []
+        
+        variants = max(1, min(variants, MAX_IMAGE_VARIANTS))
+        try:
+            prompt = self._build_business_infographic_prompt(topic, headline, style, include_stats, brand_colors)
+            log_agent_action("ImagenGenerator", f"Generating {variants} business infographic variants", f"Topic: {topic}")
+            return [url for url in self._generate_and_upload(prompt, topic, variants) if url]
+        except Exception as e:
+            log_error(e, "Imagen variant generation")
+            return []
+    
+    def _ensure_bucket(self) -> bool:
+        """
+        Resolve the upload bucket before paying for a generation.
+
+        A missing bucket that can't be created, or missing permissions,
+        disables the generator so later calls skip Vertex entirely.
+        """
+        try:
+            self.bucket
+            return True
+        except Exception as e:
+            log_error(e, "GCS bucket lookup")
+            self.enabled = False
+            logger.warning("[WARN] GCS bucket unavailable, disabling Imagen generation")
+            return False
+    
+    def _generate_and_upload(self, prompt: str, topic: str, count: int) -> List[Optional[str]]:
+        """Generate `count` images in one model call and upload them in parallel"""
+        if not self._ensure_bucket():
+            return []
+        
+        # Generate image with Gemini 3 Pro Image
+        response = self.model.generate_images(
+            prompt=prompt,
+            number_of_images=count,
+            aspect_ratio="16:9",  # LinkedIn optimal ratio (1200x675)
+            safety_filter_level="block_some"
+        )
+        
+        # Get the generated images
+        if not response.images:
+            logger.error("No images generated")
+            return []
+        
+        if len(response.images) == 1:
+            return [self._upload_to_gcs(response.images[0], topic)]
+        
+        # Uploads are network-bound, so threads overlap them fine
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(response.images)) as pool:
+            return list(pool.map(lambda image: self._upload_to_gcs(image, topic), response.images))
+    
+    async def generate_linkedin_image_async(self, topic: str, headline: str = None, **kwargs) -> Optional[str]:
+        """
+        Awaitable generate_linkedin_image; the blocking Vertex call and GCS
+        upload run in a worker thread so the event loop stays free.
+        """
+        return await asyncio.to_thread(self.generate_linkedin_image, topic, headline, **kwargs)
+    
+    async def generate_linkedin_images(
+        self,
+        posts: List[Dict[str, Any]],
+        concurrency: int = IMAGEN_CONCURRENCY
+    ) -> List[Optional[str]]:
+        """
+        Generate infographics for several posts concurrently
+        
+        Args:
+            posts: generate_linkedin_image keyword arguments, one dict per post
+                (at least 'topic')
+            concurrency: Maximum generations in flight at once
+            
+        Returns:
+            Public URL per post, in input order (None where generation failed)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _run(post: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                return await self.generate_linkedin_image_async(**post)
+        
+        return list(await asyncio.gather(*(_run(post) for post in posts)))
+    
+    @staticmethod
+    def _cache_key(prompt: str) -> str:
+        """Cache key for the image generated from an exact prompt"""
+        return "imagen:" + hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    
     def _build_business_infographic_prompt(
         self,
         topic: str,
@@ -150,74 +362,14 @@ class ImagenGenerator:
         # Use headline or topic
         text_content = headline if headline else topic
         
-        # Build prompt for BUSINESS INFOGRAPHIC
-        prompt = f"""Create a professional LinkedIn business infographic image. This MUST be a BUSINESS GRAPHIC, NOT a photograph.
-
-CRITICAL: This is a BUSINESS INFOGRAPHIC for LinkedIn, NOT a photorealistic scene, landscape, or photo.
-
-CONTENT:
-- Main headline text: "{text_content}"
-- Topic: {topic}
-- Display the headline prominently and clearly
-
-VISUAL STYLE:
-- Professional business presentation style (like PowerPoint or Keynote slides)
-- Clean, modern corporate design
-- Suitable for LinkedIn professional audience
-- Similar to business dashboards or infographics
-- NOT a photograph, NOT a scenic image, NOT realistic imagery
-
-LAYOUT TYPE - Choose ONE:
-1. Text-focused: Large headline on solid colored background with minimal graphics
-2. Diagram: Flow chart or process diagram with boxes and arrows  
-3. Data visualization: Chart or graph showing statistics
-4. Split layout: Text on one side, simple icon/graphic on other
-
-DESIGN SPECIFICATIONS:
-- Aspect ratio: 16:9 (landscape, 1200x675 pixels)
-- Background: Solid color gradient (navy blue to dark blue) OR light gray
-- Typography: Large, bold, professional sans-serif font
-- Text color: High contrast (white on dark, or dark on light)
-- Graphics: Simple icons, shapes, or diagrams (NOT photos)
-- Professional business aesthetic
-
-COLOR SCHEME:
-- Primary: {brand_colors['primary']} (navy/dark blue)
-- Secondary: {brand_colors['secondary']} (white)
-- Accent: {brand_colors['accent']} (light blue for highlights)
-- Use corporate/professional color palette
-
-TEXT RENDERING:
-- Make headline text LARGE and READABLE
-- Use professional typography
-- High contrast for readability
-- Center or left-align based on layout
-
-STYLE KEYWORDS:
-- Corporate presentation
-- Business infographic
-- Professional slide design
-- LinkedIn post graphic
-- Clean and minimal
-- Data visualization style
-
-AVOID:
-- Photorealistic images
-- Landscapes or scenic photos
-- People or faces
-- Stock photography look
-- Cluttered designs
-- Too much text (keep it concise)
-
-EXAMPLES OF CORRECT STYLE:
-- PowerPoint title slide with large text
-- Business dashboard screenshot
-- Flow diagram with boxes and arrows
-- Data chart or graph
-- Professional quote card
-- Corporate announcement graphic
-
-Generate a clean, professional business infographic suitable for a LinkedIn post."""
+        # Fill the static BUSINESS INFOGRAPHIC prompt
+        prompt = BUSINESS_INFOGRAPHIC_PROMPT.format(
+            text_content=text_content,
+            topic=topic,
+            primary=brand_colors['primary'],
+            secondary=brand_colors['secondary'],
+            accent=brand_colors['accent']
+        )
 
         if include_stats:
             prompt += "\n\n- Include a data visualization element (chart, graph, or prominent statistic)"
@@ -228,9 +380,9 @@ Generate a clean, professional business infographic suitable for a LinkedIn post
         """Upload generated image to Google Cloud Storage"""
         try:
             # Generate unique filename with timestamp, unique ID, and topic
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             unique_id = str(uuid.uuid4())[:8]  # Short unique ID for traceability
-            safe_topic = "".join(c if c.isalnum() else "_" for c in topic[:25])
+            safe_topic = _UNSAFE_NAME_CHARS_RE.sub("_", topic[:25])
             filename = f"linkedin_posts/{timestamp}_{unique_id}_{safe_topic}.png"
             
             # Create blob
@@ -239,14 +391,7 @@ Generate a clean, professional business infographic suitable for a LinkedIn post
             # Get image bytes
             image_bytes = image._image_bytes
             
-            # Upload with public access
-            blob.upload_from_string(
-                image_bytes,
-                content_type="image/png"
-            )
-            
-            # Make public
-            blob.make_public()
+            self._upload_bytes(blob, image_bytes)
             
             public_url = blob.public_url
             logger.info(f"[OK] Image uploaded to GCS: {filename}")
@@ -256,10 +401,68 @@ Generate a clean, professional business infographic suitable for a LinkedIn post
         except Exception as e:
             log_error(e, "GCS upload")
             return None
+    
+    def _uses_object_acls(self) -> bool:
+        """
+        Whether objects need a public-read ACL of their own.
+
+        With uniform bucket-level access, public reads come from bucket IAM
+        and object ACL calls are rejected, so none are sent.
+        """
+        return not self.bucket.iam_configuration.uniform_bucket_level_access_enabled
+    
+    def _upload_bytes(self, blob, image_bytes: bytes):
+        """Upload PNG bytes to a new, publicly readable blob, in parallel chunks when large"""
+        object_acls = self._uses_object_acls()
+        
+        if len(image_bytes) < SINGLE_REQUEST_UPLOAD_LIMIT or transfer_manager is None:
+            # One multipart request, no resumable-session round trip, with the
+            # public ACL applied by the upload itself instead of a follow-up
+            # PATCH. The generation precondition makes the upload safe to retry.
+            blob.upload_from_string(
+                image_bytes,
+                content_type="image/png",
+                predefined_acl="publicRead" if object_acls else None,
+                if_generation_match=0,
+                checksum="crc32c"
+            )
+            return
+        
+        # transfer_manager reads from a file; delete=False so it can be reopened on Windows
+        tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+        try:
+            with tmp:
+                tmp.write(image_bytes)
+            transfer_manager.upload_chunks_concurrently(
+                tmp.name,
+                blob,
+                content_type="image/png",
+                chunk_size=UPLOAD_CHUNK_SIZE,
+                worker_type=transfer_manager.THREAD,
+                max_workers=UPLOAD_MAX_WORKERS
+            )
+        finally:
+            os.remove(tmp.name)
+        
+        # Chunked uploads can't carry a predefined ACL
+        if object_acls:
+            blob.make_public()
+
+
+# Global instance, created on first use so importing this module makes no
+# Vertex AI or Cloud Storage calls
+_imagen_generator: Optional[ImagenGenerator] = None
+_imagen_generator_lock = threading.Lock()
 
 
-# Global instance
-imagen_generator = ImagenGenerator()
+def get_imagen_generator() -> ImagenGenerator:
+    """Get or create the global Imagen generator"""
+    global _imagen_generator
+    if _imagen_generator is None:
+        with _imagen_generator_lock:
+            if _imagen_generator is None:
+                _imagen_generator = ImagenGenerator()
+    return _imagen_generator
 
 
 def create_linkedin_image(
@@ -278,4 +481,4 @@ def create_linkedin_image(
     Returns:
         Public URL of generated image
     """
-    return imagen_generator.generate_linkedin_image(topic, headline, style)
+    return get_imagen_generator().generate_linkedin_image(topic, headline, style)
@@ -3,36 +3,40 @@ import re
 from typing import Dict, Any
 from .logger import log_error
 
+# orjson parses clean responses several times faster than the stdlib;
+# it is optional and everything falls back to json when it's missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# A double-quoted JSON string, honoring backslash escapes. An unterminated
+# string runs to the end of the text, as LLM output is sometimes cut off.
+# Escape pairs outside strings are matched too so an escaped quote there
+# never opens a string.
+_JSON_STRING_RE = re.compile(r'\\.|"[^"\\]*(?:\\.[^"\\]*)*(?:"|\Z)', re.DOTALL)
+# Control characters JSON never allows raw (\n, \r and \t are kept)
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+# Markdown code fences around the JSON (```json ... ```), with the
+# whitespace next to them, removed together in one pass
+_FENCE_RE = re.compile(r'\A```(?:json)?\s*|\s*```\Z')
+
+
+def _escape_string_newlines(match: re.Match) -> str:
+    token = match.group(0)
+    if token[0] != '"':
+        return token
+    return token.replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+
+
 def _fix_multiline_json_strings(text: str) -> str:
     """
     Fix literal newlines inside JSON string values.
     LLMs often return multi-line content inside JSON which is invalid.
     This converts literal newlines to \\n escape sequences.
     """
-    # More aggressive approach: replace newlines between quotes
-    # First, let's try to identify if we're inside a string value
-    result = []
-    in_string = False
-    i = 0
-    while i < len(text):
-        char = text[i]
-        
-        if char == '"' and (i == 0 or text[i-1] != '\\'):
-            in_string = not in_string
-            result.append(char)
-        elif char == '\n' and in_string:
-            result.append('\\n')
-        elif char == '\r' and in_string:
-            # Skip \r if followed by \n
-            if i + 1 < len(text) and text[i+1] == '\n':
-                pass  # Will be handled as \n
-            else:
-                result.append('\\n')
-        else:
-            result.append(char)
-        i += 1
-    
-    return ''.join(result)
+    # One regex pass finds every string literal; only their newlines change
+    return _JSON_STRING_RE.sub(_escape_string_newlines, text)
 
 def parse_llm_json_response(text: str, default_on_error: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -47,9 +51,20 @@ def parse_llm_json_response(text: str, default_on_error: Dict[str, Any]) -> Dict
     """
     # Remove markdown code blocks (e.g., ```json ... ```)
     # Handle various formats: ```json, ``` alone, with or without newlines
-    text = re.sub(r'^```(?:json)?\s*', '', text.strip())
-    text = re.sub(r'```\s*$', '', text.strip())
+    # Well-behaved responses have no fences, so only run the regexes if
+    # needed; strip() returns a bare object unchanged without copying it
     text = text.strip()
+    if text.startswith('```') or text.endswith('```'):
+        text = _FENCE_RE.sub('', text)
+    
+    # Single fast path for clean JSON, fenced or not; orjson rejects raw
+    # control characters, so anything it refuses goes through the lenient
+    # stdlib cascade below
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
     
     try:
         # Try parsing with strict=False to handle control characters
@@ -66,7 +81,7 @@ def parse_llm_json_response(text: str, default_on_error: Dict[str, Any]) -> Dict
         # Try cleaning control characters manually
         try:
             # Remove invalid control characters (keep \n, \r, \t)
-            cleaned_text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', text)
+            cleaned_text = _CONTROL_CHARS_RE.sub('', text)
             return json.loads(cleaned_text, strict=False)
         except json.JSONDecodeError as e2:
             # If still failing, try extracting JSON object manually
@@ -78,7 +93,7 @@ def parse_llm_json_response(text: str, default_on_error: Dict[str, Any]) -> Dict
                     json_str = text[start:end+1]
                     # Clean and escape newlines
                     json_str = _fix_multiline_json_strings(json_str)
-                    json_str = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', json_str)
+                    json_str = _CONTROL_CHARS_RE.sub('', json_str)
                     return json.loads(json_str, strict=False)
             except:
                 pass
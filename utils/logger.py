@@ -1,29 +1,63 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 from datetime import datetime
 import os
 
 # Create logs directory if it doesn't exist
 os.makedirs("logs", exist_ok=True)
 
+# Log calls only enqueue the record; a background listener thread owns the
+# file and console handlers, so callers never block on disk writes
+_log_queue = queue.Queue(-1)
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+# Render just the message (plus traceback) when enqueuing; the real
+# handlers apply the full format below on the listener thread
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+_file_handler = logging.FileHandler(f"logs/agent_{datetime.now().strftime('%Y%m%d')}.log", delay=True)
+_file_handler.setFormatter(_formatter)
+_stream_handler = logging.StreamHandler()  # Also log to console
+_stream_handler.setFormatter(_formatter)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(f"logs/agent_{datetime.now().strftime('%Y%m%d')}.log"),
-        logging.StreamHandler()  # Also log to console
-    ]
+    handlers=[_queue_handler]
 )
 
+# basicConfig is a no-op if the root logger was already configured elsewhere
+if _queue_handler in logging.getLogger().handlers:
+    _queue_listener = logging.handlers.QueueListener(
+        _log_queue, _file_handler, _stream_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
+_logger = logging.getLogger("LinkedInAgent")
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "warn": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
 def log(message: str, level: str = "info"):
     """Log message with specified level"""
-    logger = logging.getLogger("LinkedInAgent")
-    getattr(logger, level.lower())(message)
+    _logger.log(_LEVELS.get(level) or _LEVELS[level.lower()], message)
 
+# The helpers below pass %-style args so nothing is formatted for records
+# the level filters out
 def log_agent_action(agent_name: str, action: str, details: str = ""):
     """Log agent-specific actions"""
-    log(f"[{agent_name}] {action}: {details}")
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info("[%s] %s: %s", agent_name, action, details)
 
 def log_error(error: Exception, context: str = ""):
     """Log errors with context"""
-    log(f"ERROR in {context}: {str(error)}", "error")
\ No newline at end of file
+    if _logger.isEnabledFor(logging.ERROR):
+        _logger.error("ERROR in %s: %s", context, error)
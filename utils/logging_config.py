@@ -8,45 +8,92 @@ from datetime import datetime
 from pathlib import Path
 from loguru import logger
 from functools import wraps
+import threading
 import time
 
-# Create logs directory
 LOGS_DIR = Path(__file__).parent.parent / "logs"
-LOGS_DIR.mkdir(exist_ok=True)
-
-# Remove default handler
-logger.remove()
-
-# Console handler with color
-logger.add(
-    sys.stderr,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{extra[trace_id]}</cyan> | <level>{message}</level>",
-    level="INFO",
-    colorize=True,
-    filter=lambda record: "trace_id" in record["extra"]
-)
-
-# File handler for all logs with rotation
-logger.add(
-    LOGS_DIR / "cis_{time:YYYY-MM-DD}.log",
-    format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[trace_id]} | {message}",
-    level="DEBUG",
-    rotation="10 MB",
-    retention="7 days",
-    compression="zip",
-    filter=lambda record: "trace_id" in record["extra"]
-)
-
-# Error-only file handler
-logger.add(
-    LOGS_DIR / "errors_{time:YYYY-MM-DD}.log",
-    format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[trace_id]} | {message}\n{exception}",
-    level="ERROR",
-    rotation="5 MB",
-    retention="30 days",
-    compression="zip",
-    filter=lambda record: "trace_id" in record["extra"]
-)
+
+# Sinks are attached on first use so importing this module stays cheap
+_configured = False
+_configure_lock = threading.Lock()
+# Ids of the sinks added below; only these are ever removed, so sinks other
+# code attached to the shared loguru logger are left alone
+_sink_ids: list[int] = []
+# loguru's own default stderr sink, which the console sink below replaces
+_LOGURU_DEFAULT_SINK_ID = 0
+
+
+def _has_trace_id(record) -> bool:
+    """Only CIS records (bound with a trace_id) go to the CIS sinks"""
+    return "trace_id" in record["extra"]
+
+
+def _remove_sinks():
+    """Detach the sinks this module added; they're re-added on next use"""
+    global _configured
+    with _configure_lock:
+        while _sink_ids:
+            logger.remove(_sink_ids.pop())
+        _configured = False
+
+
+def _ensure_configured():
+    """Attach the console and rotating file sinks once (thread-safe)"""
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        
+        # Create logs directory
+        LOGS_DIR.mkdir(exist_ok=True)
+        
+        # Remove loguru's default handler (if nobody did already) so CIS
+        # records aren't printed twice
+        try:
+            logger.remove(_LOGURU_DEFAULT_SINK_ID)
+        except ValueError:
+            pass
+        
+        # Console handler with color
+        _sink_ids.append(logger.add(
+            sys.stderr,
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{extra[trace_id]}</cyan> | <level>{message}</level>",
+            level="INFO",
+            colorize=True,
+            filter=_has_trace_id
+        ))
+        
+        # File handler for all logs with rotation (enqueue: writes, rotation and
+        # zip compression run on loguru's worker thread, not the caller's)
+        _sink_ids.append(logger.add(
+            LOGS_DIR / "cis_{time:YYYY-MM-DD}.log",
+            format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[trace_id]} | {message}",
+            level="DEBUG",
+            rotation="10 MB",
+            retention="7 days",
+            compression="zip",
+            enqueue=True,
+            filter=_has_trace_id
+        ))
+        
+        # Error-only file handler
+        _sink_ids.append(logger.add(
+            LOGS_DIR / "errors_{time:YYYY-MM-DD}.log",
+            format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[trace_id]} | {message}\n{exception}",
+            level="ERROR",
+            rotation="5 MB",
+            retention="30 days",
+            compression="zip",
+            enqueue=True,
+            filter=_has_trace_id
+        ))
+        
+        _configured = True
+    
+    # Initialize with a startup log
+    logger.bind(trace_id=generate_trace_id()).info("CIS Logging initialized")
 
 
 def generate_trace_id() -> str:
@@ -56,6 +103,7 @@ def generate_trace_id() -> str:
 
 def get_logger(trace_id: str = None):
     """Get a logger instance with trace ID context"""
+    _ensure_configured()
     if trace_id is None:
         trace_id = generate_trace_id()
     return logger.bind(trace_id=trace_id)
@@ -136,8 +184,3 @@ def timed_operation(operation_name: str):
         
         return wrapper
     return decorator
-
-
-# Initialize with a startup log
-startup_log = get_logger(generate_trace_id())
-startup_log.info("CIS Logging initialized")
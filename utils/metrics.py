@@ -5,25 +5,60 @@ Tracks generation metrics, user metrics, and performance stats
 import streamlit as st
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from collections import defaultdict
+from collections import defaultdict, deque
+import atexit
 import json
+import os
+import threading
+import time
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Metrics storage file
 METRICS_FILE = Path(__file__).parent.parent / "logs" / "metrics.json"
 
+# Changes are written in the background at most this often, or sooner once
+# this many events have piled up; anything pending is written at exit
+FLUSH_INTERVAL_SECONDS = 2.0
+FLUSH_AFTER_MUTATIONS = 50
+
+# Averages cover the most recent generations; older samples aren't kept
+METRICS_WINDOW = 100
+
 
 class MetricsTracker:
     """Track and store application metrics"""
     
     def __init__(self):
+        # Resolved once so the exit-time flush writes where this tracker loaded from
+        self._metrics_file = METRICS_FILE
         self.metrics = self._load_metrics()
+        
+        # Bounded sample windows with running sums, so averages are O(1)
+        generations = self.metrics["generations"]
+        generations["scores"] = deque(generations.get("scores", [])[-METRICS_WINDOW:], maxlen=METRICS_WINDOW)
+        generations["durations"] = deque(generations.get("durations", [])[-METRICS_WINDOW:], maxlen=METRICS_WINDOW)
+        self._score_sum = sum(generations["scores"])
+        self._duration_sum = sum(generations["durations"])
+        
+        self._lock = threading.Lock()  # Guards metrics and the dirty state
+        self._write_lock = threading.Lock()  # Keeps snapshots hitting disk in order
+        self._dirty = False
+        self._mutations = 0
+        self._flush_timer = None
+        self._day_key = ""
+        self._day_rollover = 0.0  # Epoch time of the next local midnight
+        atexit.register(self.flush)
     
     def _load_metrics(self) -> Dict:
         """Load metrics from file"""
-        if METRICS_FILE.exists():
+        if self._metrics_file.exists():
             try:
-                with open(METRICS_FILE, 'r') as f:
+                with open(self._metrics_file, 'r') as f:
                     return json.load(f)
             except:
                 pass
@@ -51,77 +86,123 @@ class MetricsTracker:
         }
     
     def _save_metrics(self):
-        """Save metrics to file"""
-        METRICS_FILE.parent.mkdir(exist_ok=True)
-        
-        # Convert sets to lists for JSON serialization
-        metrics_copy = self.metrics.copy()
-        if isinstance(metrics_copy.get("users", {}).get("active_today"), set):
-            metrics_copy["users"]["active_today"] = list(metrics_copy["users"]["active_today"])
-        
-        with open(METRICS_FILE, 'w') as f:
-            json.dump(metrics_copy, f, indent=2)
+        """Save metrics to file (atomically, so readers never see a partial file)"""
+        with self._write_lock:
+            with self._lock:
+                # Serialize under the lock for a consistent snapshot; sets and deques become lists
+                if orjson is not None:
+                    data = orjson.dumps(self.metrics, option=orjson.OPT_INDENT_2, default=list)
+                else:
+                    data = json.dumps(self.metrics, indent=2, default=list).encode()
+                self._dirty = False
+                self._mutations = 0
+
+            self._metrics_file.parent.mkdir(exist_ok=True)
+            tmp_file = self._metrics_file.with_suffix(".json.tmp")
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, self._metrics_file)
+
+    def flush(self):
+        """Write pending changes now (no-op if nothing changed)"""
+        if self._dirty:
+            self._save_metrics()
+
+    def _mark_dirty(self):
+        """Record a change and schedule a background save (call with _lock held)"""
+        self._dirty = True
+        self._mutations += 1
+        if self._mutations == FLUSH_AFTER_MUTATIONS:
+            # Enough pending changes: save now instead of waiting out the interval
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._start_flush_timer(0)
+        elif self._flush_timer is None:
+            self._start_flush_timer(FLUSH_INTERVAL_SECONDS)
+
+    def _start_flush_timer(self, delay: float):
+        timer = threading.Timer(delay, self._timed_flush)
+        timer.daemon = True
+        self._flush_timer = timer
+        timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[METRICS] Failed to save metrics: {e}")
+    
+    def _today(self) -> str:
+        """Local date key ("YYYY-MM-DD"), reformatted only when the day changes (call with _lock held)"""
+        now = time.time()
+        if now >= self._day_rollover:
+            today = datetime.fromtimestamp(now)
+            self._day_key = today.strftime("%Y-%m-%d")
+            self._day_rollover = datetime.combine(today.date() + timedelta(days=1), datetime.min.time()).timestamp()
+        return self._day_key
     
     def track_generation(self, success: bool, score: int = 0, duration: float = 0, model: str = "gemini-2.5-flash"):
         """Track a content generation event"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        self.metrics["generations"]["total"] += 1
-        
-        if success:
-            self.metrics["generations"]["success"] += 1
-            self.metrics["generations"]["scores"].append(score)
-            self.metrics["generations"]["durations"].append(duration)
+        with self._lock:
+            today = self._today()
             
-            # Update averages
-            scores = self.metrics["generations"]["scores"][-100:]  # Last 100
-            durations = self.metrics["generations"]["durations"][-100:]
-            self.metrics["generations"]["avg_score"] = sum(scores) / len(scores)
-            self.metrics["generations"]["avg_duration"] = sum(durations) / len(durations)
-        else:
-            self.metrics["generations"]["failed"] += 1
-        
-        # Track by date
-        if today not in self.metrics["generations"]["by_date"]:
-            self.metrics["generations"]["by_date"][today] = {"success": 0, "failed": 0}
-        
-        if success:
-            self.metrics["generations"]["by_date"][today]["success"] += 1
-        else:
-            self.metrics["generations"]["by_date"][today]["failed"] += 1
-        
-        # Track model usage
-        if model not in self.metrics["models"]:
-            self.metrics["models"][model] = 0
-        self.metrics["models"][model] += 1
-        
-        self._save_metrics()
+            self.metrics["generations"]["total"] += 1
+            
+            if success:
+                self.metrics["generations"]["success"] += 1
+                
+                # Update averages over the last METRICS_WINDOW samples
+                scores = self.metrics["generations"]["scores"]
+                durations = self.metrics["generations"]["durations"]
+                if len(scores) == scores.maxlen:
+                    self._score_sum -= scores[0]
+                if len(durations) == durations.maxlen:
+                    self._duration_sum -= durations[0]
+                scores.append(score)
+                durations.append(duration)
+                self._score_sum += score
+                self._duration_sum += duration
+                self.metrics["generations"]["avg_score"] = self._score_sum / len(scores)
+                self.metrics["generations"]["avg_duration"] = self._duration_sum / len(durations)
+            else:
+                self.metrics["generations"]["failed"] += 1
+            
+            # Track by date
+            day = self.metrics["generations"]["by_date"].setdefault(today, {"success": 0, "failed": 0})
+            day["success" if success else "failed"] += 1
+            
+            # Track model usage
+            if model not in self.metrics["models"]:
+                self.metrics["models"][model] = 0
+            self.metrics["models"][model] += 1
+            
+            self._mark_dirty()
     
     def track_user_signup(self):
         """Track new user signup"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        self.metrics["users"]["total_signups"] += 1
-        
-        if today not in self.metrics["users"]["by_date"]:
-            self.metrics["users"]["by_date"][today] = {"signups": 0, "active": 0}
-        self.metrics["users"]["by_date"][today]["signups"] += 1
-        
-        self._save_metrics()
+        with self._lock:
+            today = self._today()
+            self.metrics["users"]["total_signups"] += 1
+            
+            self.metrics["users"]["by_date"].setdefault(today, {"signups": 0, "active": 0})["signups"] += 1
+            
+            self._mark_dirty()
     
     def track_active_user(self, user_id: str):
         """Track active user"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        if isinstance(self.metrics["users"]["active_today"], list):
-            self.metrics["users"]["active_today"] = set(self.metrics["users"]["active_today"])
-        
-        self.metrics["users"]["active_today"].add(user_id)
-        
-        if today not in self.metrics["users"]["by_date"]:
-            self.metrics["users"]["by_date"][today] = {"signups": 0, "active": 0}
-        self.metrics["users"]["by_date"][today]["active"] = len(self.metrics["users"]["active_today"])
-        
-        self._save_metrics()
+        with self._lock:
+            today = self._today()
+            
+            if isinstance(self.metrics["users"]["active_today"], list):
+                self.metrics["users"]["active_today"] = set(self.metrics["users"]["active_today"])
+            
+            self.metrics["users"]["active_today"].add(user_id)
+            
+            day = self.metrics["users"]["by_date"].setdefault(today, {"signups": 0, "active": 0})
+            day["active"] = len(self.metrics["users"]["active_today"])
+            
+            self._mark_dirty()
     
     def get_generation_stats(self) -> Dict:
         """Get generation statistics"""
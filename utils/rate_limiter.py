@@ -7,15 +7,92 @@ Implements:
 - Per-user and per-IP limits
 """
 
+import bisect
+import hashlib
+import math
+import threading
 import time
+import uuid
 from typing import Optional, Dict, Tuple
 from datetime import datetime, timedelta
 import logging
 
+import redis
+
 from utils.cache import get_cache
 
 logger = logging.getLogger(__name__)
 
+# Sliding window over a sorted set of request times (ms), evaluated
+# atomically in Redis: trim expired entries, count, and add this request
+# only if it fits. Returns {allowed, count, oldest_ms}.
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window + 60000)
+    return {1, count + 1, 0}
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return {0, count, tonumber(oldest[2])}
+"""
+
+# Token bucket in a hash {tokens, ts}: refill for the elapsed time, then
+# take one token if available. Returns {allowed, tokens_left}; tokens go
+# back as a string because Lua numbers are truncated to integers on return.
+_TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+if tokens < capacity and now > ts then
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+end
+if tokens < 1 then
+    return {0, tostring(tokens)}
+end
+tokens = tokens - 1
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', key, ARGV[4])
+return {1, tostring(tokens)}
+"""
+
+# Most denied keys remembered in-process (see RateLimiter._cached_denial)
+DENY_CACHE_SIZE = 10000
+# Longest a denial is answered locally before the shared state is asked
+# again, so a reset_limit() in another worker takes effect here quickly
+DENY_CACHE_SECONDS = 5
+
+# Fixed window counter: one integer per identifier that expires with its
+# window. Returns {count, seconds_until_reset}.
+_FIXED_WINDOW_LUA = """
+local key = KEYS[1]
+local count = redis.call('INCR', key)
+local ttl = redis.call('TTL', key)
+if ttl < 0 then
+    ttl = tonumber(ARGV[1])
+    redis.call('EXPIRE', key, ttl)
+end
+return {count, ttl}
+"""
+
+# SHA1 digests match what SCRIPT LOAD would return, so workers go straight to
+# EVALSHA; the first EVAL after a NOSCRIPT caches the script server-side
+_SCRIPT_SHAS = {
+    script: hashlib.sha1(script.encode()).hexdigest()
+    for script in (_SLIDING_WINDOW_LUA, _TOKEN_BUCKET_LUA, _FIXED_WINDOW_LUA)
+}
+
 
 class RateLimiter:
     """Rate limiter with multiple strategies"""
@@ -23,6 +100,93 @@ class RateLimiter:
     def __init__(self):
         """Initialize rate limiter"""
         self.cache = get_cache()
+        # key -> (time the current denial lifts, time this entry expires);
+        # repeat requests from a denied identifier are answered here without
+        # a cache round trip
+        self._deny_cache: Dict[str, Tuple[float, float]] = {}
+        self._deny_lock = threading.Lock()
+    
+    def _cached_denial(self, key: str) -> Optional[float]:
+        """Return when a still-active denial for key lifts, if one is known"""
+        entry = self._deny_cache.get(key)
+        if entry is None:
+            return None
+        reset_at, expires_at = entry
+        if time.time() >= expires_at:
+            self._deny_cache.pop(key, None)
+            return None
+        return reset_at
+    
+    def _remember_denial(self, key: str, reset_at: float) -> None:
+        now = time.time()
+        with self._deny_lock:
+            if len(self._deny_cache) >= DENY_CACHE_SIZE:
+                for expired in [k for k, (_, e) in self._deny_cache.items() if e <= now]:
+                    del self._deny_cache[expired]
+                if len(self._deny_cache) >= DENY_CACHE_SIZE:
+                    self._deny_cache.clear()
+            self._deny_cache[key] = (reset_at, min(reset_at, now + DENY_CACHE_SECONDS))
+    
+    @staticmethod
+    def _window_denial(max_requests: int, window_seconds: int, reset_at: int) -> Tuple[bool, Dict[str, any]]:
+        """Denial result for a denial remembered by _cached_denial"""
+        return False, {
+            'allowed': False,
+            'remaining': 0,
+            'limit': max_requests,
+            'reset_at': reset_at,
+            'retry_after': max(math.ceil(reset_at - time.time()), 0),
+            'window_seconds': window_seconds
+        }
+    
+    def _redis(self):
+        """Live Redis client, or None when the cache runs on its in-memory fallback"""
+        if self.cache.using_fallback:
+            return None
+        return self.cache.client
+    
+    def _eval_script(self, client, script: str, key: str, *args) -> list:
+        """Evaluate a Lua script on one key by its precomputed SHA"""
+        try:
+            return client.evalsha(_SCRIPT_SHAS[script], 1, key, *args)
+        except redis.exceptions.NoScriptError:
+            # Not cached yet (new server, restart, flush); EVAL caches it
+            return client.eval(script, 1, key, *args)
+    
+    def _check_sliding_window_redis(
+        self,
+        client,
+        key: str,
+        max_requests: int,
+        window_seconds: int
+    ) -> Tuple[bool, Dict[str, any]]:
+        """Sliding window on a Redis sorted set, one atomic round trip"""
+        now_ms = int(time.time() * 1000)
+        window_ms = window_seconds * 1000
+        allowed, count, oldest_ms = self._eval_script(
+            client, _SLIDING_WINDOW_LUA, key, now_ms, window_ms, max_requests, uuid.uuid4().hex
+        )
+        
+        if not allowed:
+            reset_at_ms = int(oldest_ms) + window_ms
+            self._remember_denial(key, reset_at_ms / 1000)
+            return False, {
+                'allowed': False,
+                'remaining': 0,
+                'limit': max_requests,
+                'reset_at': reset_at_ms // 1000,
+                'retry_after': max(-(-(reset_at_ms - now_ms) // 1000), 0),
+                'window_seconds': window_seconds
+            }
+        
+        return True, {
+            'allowed': True,
+            'remaining': max_requests - count,
+            'limit': max_requests,
+            'reset_at': now_ms // 1000 + window_seconds,
+            'retry_after': 0,
+            'window_seconds': window_seconds
+        }
     
     def check_rate_limit(
         self,
@@ -45,10 +209,22 @@ class RateLimiter:
             info_dict contains: remaining, reset_at, retry_after
         """
         key = f"rate_limit:{resource}:{identifier}"
-        current_time = int(time.time())
-        window_start = current_time - window_seconds
         
         try:
+            client = self._redis()
+            if client is not None:
+                key = _sliding_window_key(key)
+            
+            reset_at = self._cached_denial(key)
+            if reset_at is not None:
+                return self._window_denial(max_requests, window_seconds, reset_at)
+            
+            if client is not None:
+                return self._check_sliding_window_redis(client, key, max_requests, window_seconds)
+            
+            current_time = int(time.time())
+            window_start = current_time - window_seconds
+            
             # Get current request timestamps
             timestamps_json = self.cache.get(key)
             
@@ -57,14 +233,17 @@ class RateLimiter:
             else:
                 timestamps = []
             
-            # Remove timestamps outside the window
-            timestamps = [ts for ts in timestamps if ts > window_start]
+            # Remove timestamps outside the window; the list is appended in
+            # time order, so the expired ones are a prefix
+            timestamps = timestamps[bisect.bisect_right(timestamps, window_start):]
             
             # Check if limit exceeded
             if len(timestamps) >= max_requests:
-                # Calculate when the oldest request will expire
-                oldest_timestamp = min(timestamps)
+                # Calculate when the oldest request will expire (the list
+                # is append-only in time order, so it's the first entry)
+                oldest_timestamp = timestamps[0]
                 retry_after = oldest_timestamp + window_seconds - current_time
+                self._remember_denial(key, oldest_timestamp + window_seconds)
                 
                 return False, {
                     'allowed': False,
@@ -103,6 +282,76 @@ class RateLimiter:
                 'error': str(e)
             }
     
+    def check_fixed_window(
+        self,
+        identifier: str,
+        max_requests: int,
+        window_seconds: int,
+        resource: str = "default"
+    ) -> Tuple[bool, Dict[str, any]]:
+        """
+        Check if request is within rate limit using a fixed window counter.
+        
+        Cheaper than the sliding window (one integer per identifier instead
+        of one entry per request), at the cost of allowing a burst of up to
+        2x max_requests across a window boundary. The in-memory fallback has
+        no key expiry, so it uses the sliding window instead.
+        
+        Args:
+            identifier: User ID, IP address, or other identifier
+            max_requests: Maximum requests allowed in window
+            window_seconds: Time window in seconds
+            resource: Resource name (e.g., "generation", "api_call")
+            
+        Returns:
+            Tuple of (is_allowed, info_dict)
+            info_dict contains: remaining, reset_at, retry_after
+        """
+        client = self._redis()
+        if client is None:
+            return self.check_rate_limit(identifier, max_requests, window_seconds, resource)
+        
+        key = _fixed_window_key(f"rate_limit:{resource}:{identifier}")
+        
+        try:
+            reset_at = self._cached_denial(key)
+            if reset_at is not None:
+                return self._window_denial(max_requests, window_seconds, reset_at)
+            
+            current_time = int(time.time())
+            count, ttl = self._eval_script(client, _FIXED_WINDOW_LUA, key, window_seconds)
+            reset_at = current_time + ttl
+            
+            if count > max_requests:
+                self._remember_denial(key, reset_at)
+                return False, {
+                    'allowed': False,
+                    'remaining': 0,
+                    'limit': max_requests,
+                    'reset_at': reset_at,
+                    'retry_after': ttl,
+                    'window_seconds': window_seconds
+                }
+            
+            return True, {
+                'allowed': True,
+                'remaining': max_requests - count,
+                'limit': max_requests,
+                'reset_at': reset_at,
+                'retry_after': 0,
+                'window_seconds': window_seconds
+            }
+            
+        except Exception as e:
+            logger.error(f"Rate limit check error: {e}")
+            # On error, allow the request (fail open)
+            return True, {
+                'allowed': True,
+                'remaining': max_requests,
+                'limit': max_requests,
+                'error': str(e)
+            }
+    
     def check_token_bucket(
         self,
         identifier: str,
@@ -125,33 +374,29 @@ class RateLimiter:
         key = f"token_bucket:{resource}:{identifier}"
         current_time = time.time()
         
+        reset_at = self._cached_denial(key)
+        if reset_at is not None:
+            return False, {
+                'allowed': False,
+                'tokens_remaining': 0,
+                'capacity': capacity,
+                'refill_rate': refill_rate,
+                'retry_after': int(reset_at - current_time) + 1
+            }
+        
         try:
-            # Get bucket state
-            bucket_data = self.cache.get(key)
-            
-            if bucket_data:
-                tokens = bucket_data.get('tokens', capacity)
-                last_refill = bucket_data.get('last_refill', current_time)
+            ttl = int(capacity / refill_rate) + 60
+            client = self._redis()
+            if client is not None:
+                # Refill, consume and save atomically in Redis
+                allowed, tokens = self._eval_script(
+                    client, _TOKEN_BUCKET_LUA, _token_bucket_key(key), capacity, refill_rate, current_time, ttl
+                )
+                allowed, tokens = bool(allowed), float(tokens)
             else:
-                tokens = capacity
-                last_refill = current_time
+                allowed, tokens = self._take_token_local(key, capacity, refill_rate, current_time, ttl)
             
-            # Calculate tokens to add based on time elapsed
-            time_elapsed = current_time - last_refill
-            tokens_to_add = time_elapsed * refill_rate
-            tokens = min(capacity, tokens + tokens_to_add)
-            
-            # Check if we have at least 1 token
-            if tokens >= 1:
-                # Consume 1 token
-                tokens -= 1
-                
-                # Save bucket state
-                self.cache.set(key, {
-                    'tokens': tokens,
-                    'last_refill': current_time
-                }, ttl=int(capacity / refill_rate) + 60)
-                
+            if allowed:
                 return True, {
                     'allowed': True,
                     'tokens_remaining': int(tokens),
@@ -162,6 +407,7 @@ class RateLimiter:
                 # Calculate retry after
                 tokens_needed = 1 - tokens
                 retry_after = tokens_needed / refill_rate
+                self._remember_denial(key, current_time + retry_after)
                 
                 return False, {
                     'allowed': False,
@@ -179,10 +425,51 @@ class RateLimiter:
                 'error': str(e)
             }
     
+    def _take_token_local(
+        self,
+        key: str,
+        capacity: int,
+        refill_rate: float,
+        current_time: float,
+        ttl: int
+    ) -> Tuple[bool, float]:
+        """Token bucket step on the in-memory cache; returns (allowed, tokens left)"""
+        # Get bucket state
+        bucket_data = self.cache.get(key)
+        
+        if bucket_data:
+            tokens = bucket_data.get('tokens', capacity)
+            last_refill = bucket_data.get('last_refill', current_time)
+        else:
+            tokens = capacity
+            last_refill = current_time
+        
+        # Calculate tokens to add based on time elapsed (a full bucket,
+        # the usual state after an idle period, has nothing to add)
+        if tokens < capacity:
+            time_elapsed = current_time - last_refill
+            if time_elapsed > 0:
+                tokens = min(capacity, tokens + time_elapsed * refill_rate)
+        
+        # Check if we have at least 1 token
+        if tokens < 1:
+            return False, tokens
+        
+        # Consume 1 token and save bucket state
+        tokens -= 1
+        self.cache.set(key, {
+            'tokens': tokens,
+            'last_refill': current_time
+        }, ttl=ttl)
+        return True, tokens
+    
     def reset_limit(self, identifier: str, resource: str = "default") -> bool:
         """
         Reset rate limit for an identifier.
         
+        Other workers may keep answering from their cached denial for up to
+        DENY_CACHE_SECONDS before they see the reset.
+        
         Args:
             identifier: User ID or identifier
             resource: Resource name
@@ -192,6 +479,10 @@ class RateLimiter:
         """
         try:
             key = f"rate_limit:{resource}:{identifier}"
+            for stored_key in (key, _sliding_window_key(key), _fixed_window_key(key)):
+                self._deny_cache.pop(stored_key, None)
+            self.cache.delete(_sliding_window_key(key))
+            self.cache.delete(_fixed_window_key(key))
             return self.cache.delete(key)
         except Exception as e:
             logger.error(f"Rate limit reset error: {e}")
@@ -214,12 +505,31 @@ class RateLimiter:
         """
         try:
             key = f"rate_limit:{resource}:{identifier}"
+            client = self._redis()
+            if client is not None:
+                # Request times (seconds) in the sorted set, oldest first
+                scores = client.zrange(_sliding_window_key(key), 0, -1, withscores=True)
+                return [int(score) // 1000 for _, score in scores] or None
             return self.cache.get(key)
         except Exception as e:
             logger.error(f"Get limit info error: {e}")
             return None
 
 
+def _sliding_window_key(key: str) -> str:
+    """Sorted-set key; separate from the JSON list the in-memory path stores"""
+    return f"{key}:z"
+
+
+def _fixed_window_key(key: str) -> str:
+    return f"{key}:w"
+
+
+def _token_bucket_key(key: str) -> str:
+    """Hash key for the Redis token bucket (the in-memory path keeps a dict)"""
+    return f"{key}:h"
+
+
 # Global rate limiter instance
 _rate_limiter_instance: Optional[RateLimiter] = None
 
@@ -245,7 +555,7 @@ def check_generation_limit(user_id: str) -> Tuple[bool, Dict[str, any]]:
     Returns:
         Tuple of (is_allowed, info_dict)
     """
-    return get_rate_limiter().check_rate_limit(
+    return get_rate_limiter().check_fixed_window(
         identifier=user_id,
         max_requests=10,
         window_seconds=3600,  # 1 hour
@@ -263,7 +573,7 @@ def check_api_limit(user_id: str) -> Tuple[bool, Dict[str, any]]:
     Returns:
         Tuple of (is_allowed, info_dict)
     """
-    return get_rate_limiter().check_rate_limit(
+    return get_rate_limiter().check_fixed_window(
         identifier=user_id,
         max_requests=100,
         window_seconds=3600,
@@ -281,7 +591,7 @@ def check_improvement_limit(user_id: str) -> Tuple[bool, Dict[str, any]]:
     Returns:
         Tuple of (is_allowed, info_dict)
     """
-    return get_rate_limiter().check_rate_limit(
+    return get_rate_limiter().check_fixed_window(
         identifier=user_id,
         max_requests=20,
         window_seconds=3600,
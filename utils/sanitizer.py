@@ -14,6 +14,40 @@ from html import escape
 import unicodedata
 
 
+# Basic email validation regex (RFC 5322 simplified)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Names: letters, spaces, hyphens, and apostrophes only
+_NAME_RE = re.compile(r"^[a-zA-Z\s\-']+$")
+
+# Special tokens that might confuse the model, and their harmless forms
+_PROMPT_ESCAPES = {
+    '<|im_start|>': '[IM_START]',
+    '<|im_end|>': '[IM_END]',
+    '[INST]': '[INSTRUCTION]',
+    '[/INST]': '[/INSTRUCTION]',
+    '###': '# # #',
+    'System:': 'User says System:',
+    'Assistant:': 'User says Assistant:',
+}
+# Longest tokens first so a token never loses to one of its substrings
+_PROMPT_ESCAPE_RE = re.compile(
+    "|".join(re.escape(token) for token in sorted(_PROMPT_ESCAPES, key=len, reverse=True))
+)
+
+
+_NULL_TRANS = str.maketrans('', '', '\x00')
+
+
+def _normalize(text: str) -> str:
+    """NFKC-normalize text and drop null bytes, skipping work that can't change it."""
+    # ASCII is already in NFKC form
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    if '\x00' in text:
+        text = text.translate(_NULL_TRANS)
+    return text
+
+
 class InputSanitizer:
     """Sanitizes and validates user input"""
     
@@ -24,7 +58,8 @@ class InputSanitizer:
     MAX_NAME_LENGTH = 100
     
     # Dangerous patterns that might indicate prompt injection
-    PROMPT_INJECTION_PATTERNS = [
+    # (compiled once here; all matching is case-insensitive)
+    PROMPT_INJECTION_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
         r'ignore\s+(previous|above|all)\s+(instructions|prompts|rules)',
         r'system\s*:\s*you\s+are',
         r'<\s*\|\s*im_start\s*\|>',
@@ -37,10 +72,10 @@ class InputSanitizer:
         r'new\s+instructions?',
         r'you\s+must\s+now',
         r'override\s+your',
-    ]
+    )]
     
     # SQL injection patterns
-    SQL_INJECTION_PATTERNS = [
+    SQL_INJECTION_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
         r"('\s*OR\s+'1'\s*=\s*'1)",
         r'("\s*OR\s+"1"\s*=\s*"1)',
         r'(;\s*DROP\s+TABLE)',
@@ -48,7 +83,15 @@ class InputSanitizer:
         r'(UNION\s+SELECT)',
         r'(INSERT\s+INTO)',
         r'(UPDATE\s+.*\s+SET)',
-    ]
+    )]
+    
+    # Each list fused into one alternation so a check scans the text once
+    _PROMPT_INJECTION_RE = re.compile(
+        "|".join(f"(?:{p.pattern})" for p in PROMPT_INJECTION_PATTERNS), re.IGNORECASE
+    )
+    _SQL_INJECTION_RE = re.compile(
+        "|".join(f"(?:{p.pattern})" for p in SQL_INJECTION_PATTERNS), re.IGNORECASE
+    )
     
     @staticmethod
     def sanitize_topic(topic: str) -> str:
@@ -67,11 +110,8 @@ class InputSanitizer:
         if not topic or not topic.strip():
             raise ValueError("Topic cannot be empty")
         
-        # Normalize unicode characters
-        topic = unicodedata.normalize('NFKC', topic)
-        
-        # Remove null bytes
-        topic = topic.replace('\x00', '')
+        # Normalize unicode characters and remove null bytes
+        topic = _normalize(topic)
         
         # Trim whitespace
         topic = topic.strip()
@@ -108,11 +148,8 @@ class InputSanitizer:
         if not feedback or not feedback.strip():
             raise ValueError("Feedback cannot be empty")
         
-        # Normalize unicode
-        feedback = unicodedata.normalize('NFKC', feedback)
-        
-        # Remove null bytes
-        feedback = feedback.replace('\x00', '')
+        # Normalize unicode characters and remove null bytes
+        feedback = _normalize(feedback)
         
         # Trim whitespace
         feedback = feedback.strip()
@@ -152,9 +189,7 @@ class InputSanitizer:
         if len(email) > InputSanitizer.MAX_EMAIL_LENGTH:
             raise ValueError(f"Email exceeds maximum length of {InputSanitizer.MAX_EMAIL_LENGTH} characters")
         
-        # Basic email validation regex (RFC 5322 simplified)
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
+        if not _EMAIL_RE.match(email):
             raise ValueError("Invalid email format")
         
         return email
@@ -176,11 +211,8 @@ class InputSanitizer:
         if not name or not name.strip():
             raise ValueError("Name cannot be empty")
         
-        # Normalize unicode
-        name = unicodedata.normalize('NFKC', name)
-        
-        # Remove null bytes
-        name = name.replace('\x00', '')
+        # Normalize unicode characters and remove null bytes
+        name = _normalize(name)
         
         # Trim whitespace
         name = name.strip()
@@ -190,7 +222,7 @@ class InputSanitizer:
             raise ValueError(f"Name exceeds maximum length of {InputSanitizer.MAX_NAME_LENGTH} characters")
         
         # Only allow letters, spaces, hyphens, and apostrophes
-        if not re.match(r"^[a-zA-Z\s\-']+$", name):
+        if not _NAME_RE.match(name):
             raise ValueError("Name contains invalid characters")
         
         # Escape HTML
@@ -209,11 +241,8 @@ class InputSanitizer:
         Raises:
             ValueError: If prompt injection detected
         """
-        text_lower = text.lower()
-        
-        for pattern in InputSanitizer.PROMPT_INJECTION_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                raise ValueError("Input contains potentially malicious content (prompt injection detected)")
+        if InputSanitizer._PROMPT_INJECTION_RE.search(text):
+            raise ValueError("Input contains potentially malicious content (prompt injection detected)")
     
     @staticmethod
     def _check_sql_injection(text: str) -> None:
@@ -226,11 +255,8 @@ class InputSanitizer:
         Raises:
             ValueError: If SQL injection detected
         """
-        text_upper = text.upper()
-        
-        for pattern in InputSanitizer.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, text_upper, re.IGNORECASE):
-                raise ValueError("Input contains potentially malicious content (SQL injection detected)")
+        if InputSanitizer._SQL_INJECTION_RE.search(text):
+            raise ValueError("Input contains potentially malicious content (SQL injection detected)")
     
     @staticmethod
     def validate_length(text: str, max_length: int, field_name: str = "Input") -> None:
@@ -261,22 +287,8 @@ class InputSanitizer:
         Returns:
             Escaped text safe for prompts
         """
-        # Replace special tokens that might confuse the model
-        replacements = {
-            '<|im_start|>': '[IM_START]',
-            '<|im_end|>': '[IM_END]',
-            '[INST]': '[INSTRUCTION]',
-            '[/INST]': '[/INSTRUCTION]',
-            '###': '# # #',
-            'System:': 'User says System:',
-            'Assistant:': 'User says Assistant:',
-        }
-        
-        escaped = text
-        for old, new in replacements.items():
-            escaped = escaped.replace(old, new)
-        
-        return escaped
+        # One pass over the text replaces every special token
+        return _PROMPT_ESCAPE_RE.sub(lambda m: _PROMPT_ESCAPES[m.group(0)], text)
 
 
 # Convenience functions
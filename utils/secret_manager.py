@@ -3,7 +3,10 @@ Utility for loading secrets from GCP Secret Manager.
 Falls back to environment variables if Secret Manager is not available.
 """
 import os
+import concurrent.futures
 import logging
+import threading
+from functools import lru_cache
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -17,6 +20,38 @@ except ImportError:
     logger.warning("[WARN] google-cloud-secret-manager not installed - using environment variables only")
 
 
+# One client (and gRPC channel) for the process, created on first use
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Get or create the shared Secret Manager client"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = secretmanager.SecretManagerServiceClient()
+    return _client
+
+
+@lru_cache(maxsize=128)
+def _fetch_secret(secret_name: str, project: str) -> str:
+    """
+    Fetch the latest version of a secret. Values are cached for the life of
+    the process (failures raise and are not cached); call
+    ``_fetch_secret.cache_clear()`` to pick up rotated secrets.
+    """
+    # Build the resource name
+    name = f"projects/{project}/secrets/{secret_name}/versions/latest"
+    
+    # Access the secret version
+    response = _get_client().access_secret_version(request={"name": name})
+    
+    # Decode the secret payload
+    return response.payload.data.decode("UTF-8").strip()
+
+
 def get_secret(secret_name: str, project_id: Optional[str] = None, default: str = "") -> str:
     """
     Retrieve a secret from GCP Secret Manager or fall back to environment variable.
@@ -48,17 +83,7 @@ def get_secret(secret_name: str, project_id: Optional[str] = None, default: str
             logger.warning(f"[SECRET] No project ID configured, using env/default for {secret_name}")
             return default
         
-        # Create the Secret Manager client
-        client = secretmanager.SecretManagerServiceClient()
-        
-        # Build the resource name
-        name = f"projects/{project}/secrets/{secret_name}/versions/latest"
-        
-        # Access the secret version
-        response = client.access_secret_version(request={"name": name})
-        
-        # Decode the secret payload
-        secret_value = response.payload.data.decode("UTF-8").strip()
+        secret_value = _fetch_secret(secret_name, project)
         logger.info(f"[SECRET] ✓ Loaded {secret_name} from Secret Manager")
         return secret_value
         
@@ -68,22 +93,31 @@ def get_secret(secret_name: str, project_id: Optional[str] = None, default: str
         return default
 
 
+# Stripe configuration loaded at startup
+STRIPE_SECRET_NAMES = (
+    "STRIPE_SECRET_KEY",
+    "STRIPE_PUBLISHABLE_KEY",
+    "STRIPE_PRICE_PRO",
+    "STRIPE_PRICE_BUSINESS",
+    "STRIPE_WEBHOOK_SECRET_CIS_PRODUCTION",
+    "STRIPE_WEBHOOK_SECRET_ENGAGING_VICTORY",
+    "STRIPE_COUPON_ID",
+)
+
+
 def load_stripe_secrets(project_id: Optional[str] = None) -> dict:
     """
     Load all Stripe secrets from Secret Manager or environment.
     
+    The lookups are independent network calls, so they run concurrently
+    over the shared client and boot waits for the slowest one, not the sum.
+    
     Args:
         project_id: GCP project ID (optional)
         
     Returns:
         Dictionary with Stripe configuration
     """
-    return {
-        "STRIPE_SECRET_KEY": get_secret("STRIPE_SECRET_KEY", project_id),
-        "STRIPE_PUBLISHABLE_KEY": get_secret("STRIPE_PUBLISHABLE_KEY", project_id),
-        "STRIPE_PRICE_PRO": get_secret("STRIPE_PRICE_PRO", project_id),
-        "STRIPE_PRICE_BUSINESS": get_secret("STRIPE_PRICE_BUSINESS", project_id),
-        "STRIPE_WEBHOOK_SECRET_CIS_PRODUCTION": get_secret("STRIPE_WEBHOOK_SECRET_CIS_PRODUCTION", project_id),
-        "STRIPE_WEBHOOK_SECRET_ENGAGING_VICTORY": get_secret("STRIPE_WEBHOOK_SECRET_ENGAGING_VICTORY", project_id),
-        "STRIPE_COUPON_ID": get_secret("STRIPE_COUPON_ID", project_id, ""),
-    }
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(STRIPE_SECRET_NAMES)) as pool:
+        values = pool.map(lambda name: get_secret(name, project_id), STRIPE_SECRET_NAMES)
+        return dict(zip(STRIPE_SECRET_NAMES, values))
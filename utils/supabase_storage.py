@@ -10,148 +10,388 @@ SECURITY NOTE:
 KEY REQUIREMENTS:
 - SUPABASE_SERVICE_KEY is recommended for bucket creation privileges.
 - SUPABASE_ANON_KEY may fail on bucket creation operations.
+
+TUNING:
+- SUPABASE_MAX_KEEPALIVE sets how many idle connections the client keeps
+  open for reuse (default 32).
+- SUPABASE_MAX_CONCURRENT_UPLOADS caps parallel uploads in upload_many (default 8).
+- SUPABASE_UPLOAD_WORKERS sizes the thread pool behind the async upload API (default 16).
 """
+import asyncio
+import concurrent.futures
+import hashlib
+import importlib.util
+import io
+import logging
 import os
+import random
+import re
 import threading
-from supabase import create_client, Client
-from datetime import datetime
-import uuid
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+# supabase (with httpx, postgrest, auth, ...) is imported on first use so
+# importing this module stays cheap for code paths that never upload
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+# Without the SDK, fail at import as before so callers can fall back
+if importlib.util.find_spec("supabase") is None:
+    raise ImportError("No module named 'supabase'", name="supabase")
+
+logger = logging.getLogger(__name__)
 
 # Initialize Supabase client with thread-safe singleton
-_supabase_client: Client | None = None
+_supabase_client: "Client | None" = None
 _client_lock = threading.Lock()
 
-# Bucket existence cache to avoid repeated API calls
-_bucket_checked = False
+# Object names are a BLAKE2b digest of the image: identical images map to
+# the same key, so re-generated content is detected and not stored twice
+_DIGEST_SIZE = 16
+
+# Keep-alive pool for the storage HTTP client; idle connections stay open
+# for a minute so uploads spaced out across a run skip the TLS handshake
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "32"))
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+HTTP_TIMEOUT_SECONDS = 30.0
+
+# Concurrent uploads allowed per upload_many() batch
+MAX_CONCURRENT_UPLOADS = int(os.getenv("SUPABASE_MAX_CONCURRENT_UPLOADS", "8"))
+
+# Transient upload failures (throttling, gateway errors, dropped
+# connections) are retried with capped exponential backoff and full jitter;
+# the object key is fixed before the first attempt and upsert=True, so a
+# retry overwrites rather than duplicates
+UPLOAD_MAX_ATTEMPTS = 4
+UPLOAD_RETRY_BASE_DELAY = 0.5
+UPLOAD_RETRY_MAX_DELAY = 10.0
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Worker threads for the async upload API, kept apart from the loop's
+# default executor so uploads neither starve nor are starved by other
+# to_thread() users
+_UPLOAD_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("SUPABASE_UPLOAD_WORKERS", "16")), thread_name_prefix="supabase-upload"
+)
+
+# Local copies are deleted off the request path once their upload succeeds
+_cleanup_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="sb-cleanup")
+
+# Public object URL: https://xxx.supabase.co/storage/v1/object/public/<bucket>/<path>[?query]
+_PUBLIC_PATH_RE = re.compile(r"/storage/v1/object/public/(?P<bucket>[^/?#]+)/(?P<path>[^?#]+)")
+
+# Buckets already checked (or created) by this process, to avoid repeated API calls
+_verified_buckets: set[str] = set()
 _bucket_check_lock = threading.Lock()
 
 
+_CONTENT_TYPES: dict[str, str] = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml',
+    '.bmp': 'image/bmp',
+    '.ico': 'image/x-icon',
+}
+
+
 def get_content_type(ext: str) -> str:
     """Get content-type from file extension."""
-    ext_lower = ext.lower()
-    content_types = {
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.gif': 'image/gif',
-        '.webp': 'image/webp',
-        '.svg': 'image/svg+xml',
-        '.bmp': 'image/bmp',
-        '.ico': 'image/x-icon',
-    }
-    return content_types.get(ext_lower, 'image/png')
-
-
-def get_supabase_client() -> Client | None:
+    return _content_type_lower(ext.lower())
+
+
+def _content_type_lower(ext: str) -> str:
+    """Content-type for an extension the caller has already lowercased."""
+    return _CONTENT_TYPES.get(ext, 'image/png')
+
+
+def get_supabase_client() -> "Client | None":
     """Get or create Supabase client singleton (thread-safe)."""
     global _supabase_client
     
+    # Lock-free fast path once the client exists
+    if _supabase_client is not None:
+        return _supabase_client
+    
     with _client_lock:
         if _supabase_client is None:
             url = os.environ.get("SUPABASE_URL")
             key = os.environ.get("SUPABASE_SERVICE_KEY") or os.environ.get("SUPABASE_ANON_KEY")
             
             if not url or not key:
-                print("[STORAGE] Supabase credentials not found - using local storage fallback")
+                logger.warning("[STORAGE] Supabase credentials not found - using local storage fallback")
                 return None
-                
-            _supabase_client = create_client(url, key)
+            
+            from supabase import create_client, ClientOptions
+            _supabase_client = create_client(url, key, options=ClientOptions(httpx_client=_http_client()))
     
     return _supabase_client
 
 
-def upload_image_to_supabase(local_path: str, style: str = "general", cleanup_local: bool = True) -> str | None:
+def _http_client() -> "httpx.Client":
+    """HTTP/2 client with a keep-alive pool shared by all storage calls."""
+    import httpx
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=MAX_KEEPALIVE_CONNECTIONS * 2,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+_STYLE_TRANS = str.maketrans({'/': '_', '\\': '_'})
+_DOTDOT_RE = re.compile(r'\.\.+')
+
+
+def _sanitize_style(style: str) -> str:
+    """Sanitize style to prevent path traversal in the storage key."""
+    safe_style = _DOTDOT_RE.sub('_', style.translate(_STYLE_TRANS))
+    if not safe_style or safe_style.startswith('.'):
+        safe_style = "general"
+    return safe_style
+
+
+def _ensure_bucket(client: "Client", bucket_name: str) -> None:
+    """Create the bucket on first use (cached to avoid repeated API calls)."""
+    # Lock-free fast path once the bucket is known; set membership is atomic
+    if bucket_name in _verified_buckets:
+        return
+    # Deferred with the rest of the SDK (see the imports above)
+    from storage3.exceptions import StorageApiError
+    
+    with _bucket_check_lock:
+        if bucket_name in _verified_buckets:
+            return
+        try:
+            # Fetch just this bucket rather than listing every bucket
+            try:
+                client.storage.get_bucket(bucket_name)
+                bucket_exists = True
+            except StorageApiError as e:
+                # A missing bucket is a 404 (400 on older Storage servers)
+                if str(e.status) not in ("400", "404"):
+                    raise
+                bucket_exists = False
+            if not bucket_exists:
+                # Create public bucket for images
+                # SECURITY: This creates a PUBLIC bucket - all images are publicly accessible
+                try:
+                    client.storage.create_bucket(bucket_name, options={"public": True})
+                    logger.info("[STORAGE] Created PUBLIC bucket: %s", bucket_name)
+                except Exception as e:
+                    # Another worker process may have created it first
+                    logger.info("[STORAGE] Bucket create skipped (%s): %s", bucket_name, e)
+        except Exception as e:
+            logger.warning("[STORAGE] Bucket check/create warning: %s", e)
+        # Mark as checked even on error to avoid repeated failures
+        _verified_buckets.add(bucket_name)
+
+
+def _content_digest(file_data: bytes | io.BufferedReader) -> str:
+    """BLAKE2b hex digest of the image; a stream is rewound after hashing."""
+    if isinstance(file_data, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(file_data, digest_size=_DIGEST_SIZE).hexdigest()
+    digest = hashlib.file_digest(file_data, lambda: hashlib.blake2b(digest_size=_DIGEST_SIZE))
+    file_data.seek(0)
+    return digest.hexdigest()
+
+
+def _object_exists(client: "Client", bucket_name: str, filename: str) -> bool:
+    """HEAD the object key; errors count as missing so the upload still runs."""
+    try:
+        return client.storage.from_(bucket_name).exists(filename)
+    except Exception as e:
+        logger.warning("[STORAGE] Exists check failed for %s: %s", filename, e)
+        return False
+
+
+@lru_cache(maxsize=1024)
+def _public_url(bucket_name: str, filename: str) -> str:
+    """Public URL of an object; content-hash keys repeat, so results are cached."""
+    return get_supabase_client().storage.from_(bucket_name).get_public_url(filename)
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float | None:
+    """Seconds to wait before retrying a failed upload, or None if it isn't transient."""
+    import httpx
+    
+    response = None
+    if not isinstance(exc, httpx.TransportError):
+        # storage3 wraps HTTP errors in StorageApiError with the httpx error as cause
+        response = getattr(exc.__cause__, "response", None)
+        status = getattr(exc, "status", None) or getattr(response, "status_code", None)
+        try:
+            if int(status) not in _RETRYABLE_STATUS:
+                return None
+        except (TypeError, ValueError):
+            return None
+    
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        return min(float(retry_after), UPLOAD_RETRY_MAX_DELAY)
+    return random.uniform(0, min(UPLOAD_RETRY_MAX_DELAY, UPLOAD_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _upload_with_retry(client: "Client", bucket_name: str, filename: str,
+                       file_data: bytes | io.BufferedReader, content_type: str):
+    """Upload one object, retrying transient Storage failures."""
+    for attempt in range(UPLOAD_MAX_ATTEMPTS):
+        try:
+            return client.storage.from_(bucket_name).upload(
+                path=filename,
+                file=file_data,
+                file_options={"content-type": content_type, "upsert": True}
+            )
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt == UPLOAD_MAX_ATTEMPTS - 1:
+                raise
+            logger.warning("[STORAGE] Upload attempt %d failed (%s); retrying in %.1fs", attempt + 1, e, delay)
+            time.sleep(delay)
+            # A partially sent stream must be resent from the start
+            if hasattr(file_data, 'seek'):
+                file_data.seek(0)
+
+
+def upload_image_bytes_to_supabase(file_data: bytes | io.BufferedReader, style: str = "general",
+                                   ext: str = ".png") -> str | None:
     """
-    Upload an image to Supabase Storage and return the public URL.
+    Upload in-memory image bytes to Supabase Storage and return the public URL.
     
     Args:
-        local_path: Path to the local image file
+        file_data: Encoded image bytes, or a binary file opened for reading
+            (streamed to the server in chunks instead of read into memory)
         style: The style of the image (for folder organization)
-        cleanup_local: If True, delete the local file after successful upload (default: True)
+        ext: File extension used for the storage key and content-type
         
     Returns:
         Public URL of the uploaded image, or None if upload fails
     """
     try:
-        # Sanitize style to prevent path traversal
-        safe_style = style.replace('/', '_').replace('\\', '_').replace('..', '_')
-        if not safe_style or safe_style.startswith('.'):
-            safe_style = "general"
+        safe_style = _sanitize_style(style)
+        # Normalize once so the object key and content-type agree
+        ext = ext.lower()
         
         client = get_supabase_client()
         if not client:
-            print("[STORAGE] No Supabase client - returning local path")
+            logger.debug("[STORAGE] No Supabase client - returning local path")
             return None
-            
-        # Read the image file
-        with open(local_path, 'rb') as f:
-            file_data = f.read()
         
-        # Generate unique filename with timestamp and UUID
-        original_filename = os.path.basename(local_path)
-        ext = os.path.splitext(original_filename)[1] or '.png'
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_id = uuid.uuid4().hex[:8]
-        filename = f"{safe_style}/{timestamp}_{unique_id}{ext}"
+        # Content-addressed filename
+        filename = f"{safe_style}/{_content_digest(file_data)}{ext}"
         
         # Get proper content-type based on file extension
-        content_type = get_content_type(ext)
+        content_type = _content_type_lower(ext)
         
         # Upload to Supabase Storage bucket 'images'
         bucket_name = "images"
+        _ensure_bucket(client, bucket_name)
         
-        # Check if bucket exists (cached to avoid repeated API calls)
-        global _bucket_checked
-        with _bucket_check_lock:
-            if not _bucket_checked:
-                try:
-                    buckets = client.storage.list_buckets()
-                    bucket_exists = any(b.name == bucket_name for b in buckets)
-                    if not bucket_exists:
-                        # Create public bucket for images
-                        # SECURITY: This creates a PUBLIC bucket - all images are publicly accessible
-                        client.storage.create_bucket(bucket_name, options={"public": True})
-                        print(f"[STORAGE] Created PUBLIC bucket: {bucket_name}")
-                    _bucket_checked = True
-                except Exception as e:
-                    print(f"[STORAGE] Bucket check/create warning: {e}")
-                    # Mark as checked even on error to avoid repeated failures
-                    _bucket_checked = True
-        
-        # Upload the file with correct content-type
-        result = client.storage.from_(bucket_name).upload(
-            path=filename,
-            file=file_data,
-            file_options={"content-type": content_type, "upsert": True}
-        )
-        
-        # Verify upload was successful
-        if hasattr(result, 'error') and result.error:
-            print(f"[STORAGE] Upload error: {result.error}")
-            return None
+        if _object_exists(client, bucket_name, filename):
+            logger.debug("[STORAGE] Already stored, skipping upload: %s", filename)
+        else:
+            # Upload the file with correct content-type
+            result = _upload_with_retry(client, bucket_name, filename, file_data, content_type)
+            
+            # Verify upload was successful
+            if hasattr(result, 'error') and result.error:
+                logger.error("[STORAGE] Upload error: %s", result.error)
+                return None
         
         # Get public URL
-        public_url = client.storage.from_(bucket_name).get_public_url(filename)
+        public_url = _public_url(bucket_name, filename)
         
-        print(f"[STORAGE] Uploaded to Supabase: {public_url}")
-        
-        # Delete local file only if cleanup_local is True
-        if cleanup_local:
-            try:
-                os.remove(local_path)
-                print(f"[STORAGE] Cleaned up local file: {local_path}")
-            except OSError as e:
-                print(f"[STORAGE] Could not remove local file {local_path}: {e}")
-            
+        logger.info("[STORAGE] Uploaded to Supabase: %s", public_url)
         return public_url
         
-    except Exception as e:
-        print(f"[STORAGE] Upload failed: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("[STORAGE] Upload failed")
         return None
 
 
+def upload_image_to_supabase(local_path: str, style: str = "general", cleanup_local: bool = True) -> str | None:
+    """
+    Upload an image to Supabase Storage and return the public URL.
+    
+    Args:
+        local_path: Path to the local image file
+        style: The style of the image (for folder organization)
+        cleanup_local: If True, delete the local file after successful upload (default: True)
+        
+    Returns:
+        Public URL of the uploaded image, or None if upload fails
+    """
+    ext = (os.path.splitext(local_path)[1] or '.png').lower()
+    try:
+        # Stream the file handle; the HTTP client reads it in chunks
+        with open(local_path, 'rb') as f:
+            public_url = upload_image_bytes_to_supabase(f, style, ext)
+    except OSError as e:
+        logger.error("[STORAGE] Upload failed: %s", e)
+        return None
+    
+    # Delete local file only if cleanup_local is True
+    if public_url and cleanup_local:
+        _cleanup_executor.submit(_remove_local_file, local_path)
+        
+    return public_url
+
+
+async def upload_image_to_supabase_async(local_path: str, style: str = "general",
+                                        cleanup_local: bool = True) -> str | None:
+    """
+    Async variant of ``upload_image_to_supabase`` for coroutine callers.
+    
+    The supabase-py storage client is synchronous, so the file read and the
+    upload run on the upload pool and the event loop stays free meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_UPLOAD_POOL, upload_image_to_supabase, local_path, style, cleanup_local)
+
+
+async def upload_many(local_paths: list[str], style: str = "general",
+                      cleanup_local: bool = True) -> list[str | None]:
+    """
+    Upload several images concurrently and return their public URLs.
+    
+    Uploads overlap (at most MAX_CONCURRENT_UPLOADS at a time), so a batch
+    takes about as long as its slowest upload rather than the sum.
+    
+    Args:
+        local_paths: Paths to the local image files
+        style: The style of the images (for folder organization)
+        cleanup_local: If True, delete each local file after its upload
+        
+    Returns:
+        Public URLs in input order, None for any upload that failed
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+    
+    async def _bounded_upload(local_path: str) -> str | None:
+        async with semaphore:
+            return await upload_image_to_supabase_async(local_path, style, cleanup_local)
+    
+    results = await asyncio.gather(*(_bounded_upload(p) for p in local_paths), return_exceptions=True)
+    return [None if isinstance(r, BaseException) else r for r in results]
+
+
+def _remove_local_file(local_path: str) -> None:
+    """Delete an uploaded local file, logging instead of raising on failure."""
+    try:
+        os.remove(local_path)
+        logger.debug("[STORAGE] Cleaned up local file: %s", local_path)
+    except OSError as e:
+        logger.warning("[STORAGE] Could not remove local file %s: %s", local_path, e)
+
+
 def delete_image_from_supabase(public_url: str) -> bool:
     """
     Delete an image from Supabase Storage.
@@ -167,25 +407,68 @@ def delete_image_from_supabase(public_url: str) -> bool:
         if not client:
             return False
             
-        # Extract path from URL
-        # URL format: https://xxx.supabase.co/storage/v1/object/public/images/style/filename.png
-        if "/storage/v1/object/public/images/" in public_url:
-            path = public_url.split("/storage/v1/object/public/images/")[1]
-            # Remove query parameters if present (e.g., ?v=123 cache-busting)
-            if "?" in path:
-                path = path.split("?")[0]
-            result = client.storage.from_("images").remove([path])
-            
-            # Verify the deletion succeeded
-            if hasattr(result, 'error') and result.error:
-                print(f"[STORAGE] Delete failed: {result.error}")
-                return False
-            
-            print(f"[STORAGE] Deleted: {path}")
-            return True
-            
-        return False
+        # Extract bucket and path from URL in one match; query parameters
+        # (e.g., ?v=123 cache-busting) are left out of the path
+        match = _PUBLIC_PATH_RE.search(public_url)
+        if not match:
+            return False
+        
+        path = match["path"]
+        result = client.storage.from_(match["bucket"]).remove([path])
+        
+        # Verify the deletion succeeded
+        if hasattr(result, 'error') and result.error:
+            logger.error("[STORAGE] Delete failed: %s", result.error)
+            return False
+        
+        logger.info("[STORAGE] Deleted: %s", path)
+        return True
         
     except Exception as e:
-        print(f"[STORAGE] Delete failed: {e}")
+        logger.error("[STORAGE] Delete failed: %s", e)
         return False
+
+
+# Storage's remove endpoint accepts at most this many keys per request
+_MAX_REMOVE_BATCH = 1000
+
+
+def delete_images_from_supabase(public_urls: list[str]) -> int:
+    """
+    Delete several images from Supabase Storage in as few requests as possible.
+    
+    Keys are grouped by bucket and removed in batches of up to 1000, instead
+    of one request per image.
+    
+    Args:
+        public_urls: Public URLs of the images to delete
+        
+    Returns:
+        Number of images deleted; URLs that aren't Supabase object URLs are skipped
+    """
+    client = get_supabase_client()
+    if not client:
+        return 0
+    
+    paths_by_bucket: dict[str, list[str]] = {}
+    for public_url in public_urls:
+        match = _PUBLIC_PATH_RE.search(public_url)
+        if match:
+            paths_by_bucket.setdefault(match["bucket"], []).append(match["path"])
+    
+    deleted = 0
+    for bucket_name, paths in paths_by_bucket.items():
+        for start in range(0, len(paths), _MAX_REMOVE_BATCH):
+            batch = paths[start:start + _MAX_REMOVE_BATCH]
+            try:
+                result = client.storage.from_(bucket_name).remove(batch)
+                if hasattr(result, 'error') and result.error:
+                    logger.error("[STORAGE] Delete failed: %s", result.error)
+                    continue
+            except Exception as e:
+                logger.error("[STORAGE] Delete failed: %s", e)
+                continue
+            deleted += len(batch)
+    
+    logger.info("[STORAGE] Deleted %d of %d images", deleted, len(public_urls))
+    return deleted
@@ -2,11 +2,9 @@ import asyncio
 import os
 import json
 import random
+import sys
 from datetime import datetime
 
-# Set Windows event loop policy
-asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-
 # Import agents
 from agents.content_agent import ContentAgent
 from agents.virality_agent import ViralityAgent
@@ -16,7 +14,25 @@ from agents.publisher_agent import PublisherAgent
 from database.supabase_client import save_draft_post, approve_post
 
 # Import logger
-from utils.logger import log, log_agent_action
+from utils.logger import log, log_agent_action, log_error
+
+
+def _configure_event_loop():
+    """Selector loop on Windows; uvloop on POSIX when it is installed"""
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+async def _score_post(post_text: str) -> dict:
+    """Score a post for virality"""
+    virality_agent = ViralityAgent()
+    return await virality_agent.score_post(post_text)
 
 async def daily_post():
     """Automated daily posting workflow"""
@@ -42,12 +58,12 @@ async def daily_post():
     
     # Score for virality
     try:
-        virality_agent = ViralityAgent()
-        virality_result = await virality_agent.score_post(post_data["post_text"])
+        virality_result = await _score_post(post_data["post_text"])
         score = virality_result["score"]
         log_agent_action("ViralityAgent", "Scored post", f"Score: {score}")
     except Exception as e:
         log_error(e, "Virality scoring")
+        virality_result = {}
         score = 50  # Default score
     
     # Save to database
@@ -91,4 +107,7 @@ async def daily_post():
     log("=== Daily Post Workflow Complete ===")
 
 if __name__ == "__main__":
-    asyncio.run(daily_post())
\ No newline at end of file
+    # Only when run as a script: importers (servers, test runners) keep
+    # whatever loop policy they already installed
+    _configure_event_loop()
+    asyncio.run(daily_post())